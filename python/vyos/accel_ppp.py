@@ -43,28 +43,92 @@ def accel_cmd(port: int, command: str) -> str:
     return output
 
 
-def accel_out_parse(accel_output: list[str]) -> list[dict[str, str]]:
-    """ Parse accel-cmd show sessions output """
-    data_list: list[dict[str, str]] = list()
-    field_names: list[str] = list()
+def accel_out_parse(accel_output) -> list[dict[str, str]]:
+    """ Parse accel-cmd show sessions output
 
-    field_names_unstripped: list[str] = accel_output.pop(0).split('|')
-    for field_name in field_names_unstripped:
-        field_names.append(field_name.strip())
+    The first line holds the column headers, every following line containing
+    a '|' separator is a session row. Any iterable of lines is accepted and it
+    is consumed in a single pass.
+    """
+    lines = iter(accel_output)
+    header = next(lines, None)
+    if header is None:
+        return []
 
-    while accel_output:
-        if '|' not in accel_output[0]:
-            accel_output.pop(0)
-            continue
+    field_names: list[str] = [name.strip() for name in header.split('|')]
+    return [dict(zip(field_names, (value.strip() for value in line.split('|'))))
+            for line in lines if '|' in line]
 
-        current_item: list[str] = accel_output.pop(0).split('|')
-        item_dict: dict[str, str] = {}
 
-        for field_index in range(len(current_item)):
-            field_name: str = field_names[field_index]
-            field_value: str = current_item[field_index].strip()
-            item_dict[field_name] = field_value
+class SessionIndex:
+    """ Lookup tables over a list of parsed accel-ppp sessions
 
-        data_list.append(item_dict)
+    Sessions are indexed by username, IPv4/IPv6 address and interface name so
+    filtered queries do not have to scan the full session list.
+    """
+    def __init__(self, sessions: list[dict[str, str]]):
+        self.sessions = sessions
+        self.by_username: dict[str, list[int]] = {}
+        self.by_ip: dict[str, list[int]] = {}
+        self.by_ifname: dict[str, list[int]] = {}
 
-    return data_list
+        for idx, session in enumerate(sessions):
+            username = session.get('username')
+            if username:
+                self.by_username.setdefault(username, []).append(idx)
+            for key in ['ip', 'ip6', 'ip6-dp']:
+                address = session.get(key)
+                if address:
+                    # IPv6 columns carry the prefix length
+                    self.by_ip.setdefault(address.split('/')[0], []).append(idx)
+            ifname = session.get('ifname')
+            if ifname:
+                self.by_ifname.setdefault(ifname, []).append(idx)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def find(self, username=None, ip=None, ifname=None) -> list[dict[str, str]]:
+        """ Return all sessions matching every given criteria, in the order
+        reported by accel-ppp """
+        candidates = None
+        for table, value in [(self.by_username, username),
+                             (self.by_ip, ip and ip.split('/')[0]),
+                             (self.by_ifname, ifname)]:
+            if value is None:
+                continue
+            matches = set(table.get(value, []))
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+
+        if candidates is None:
+            return list(self.sessions)
+        return [self.sessions[idx] for idx in sorted(candidates)]
+
+
+# Session index cache, keyed by (port, command) - entries are re-used for
+# session_cache_ttl seconds to spare repeated full session dumps for callers
+# running in a long lived process (e.g. the HTTP API server)
+session_cache_ttl = 5
+_session_cache: dict = {}
+
+def get_session_index(port: int, command: str, ttl=None) -> SessionIndex:
+    """ Return a SessionIndex for "accel-cmd <command>" output. A cached index
+    younger than ttl seconds is re-used, ttl=0 forces a fresh dump """
+    from time import monotonic
+
+    if ttl is None:
+        ttl = session_cache_ttl
+
+    key = (port, command)
+    now = monotonic()
+    if ttl > 0 and key in _session_cache:
+        timestamp, index = _session_cache[key]
+        if now - timestamp < ttl:
+            return index
+
+    output = accel_cmd(port, command)
+    index = SessionIndex(accel_out_parse(output.splitlines()))
+    _session_cache[key] = (now, index)
+    return index
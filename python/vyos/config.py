@@ -90,6 +90,21 @@ def config_dict_merge(src: dict, dest: Union[dict, ConfigDict]) -> ConfigDict:
         dest = ConfigDict(dest)
     return ext_dict_merge(src, dest)
 
+def _copy_config_dict(d):
+    # structural copy of a config dict: only dicts and lists are mutable,
+    # so this is considerably cheaper than copy.deepcopy
+    if isinstance(d, dict):
+        res = type(d)((k, _copy_config_dict(v)) for k, v in d.items())
+        if isinstance(d, ConfigDict):
+            # metadata is shared, it is not modified by consumers
+            for attr in ('_from_defaults', '_dict_kwargs', 'interfaces_root'):
+                if attr in vars(d):
+                    setattr(res, attr, getattr(d, attr))
+        return res
+    if isinstance(d, list):
+        return [_copy_config_dict(v) for v in d]
+    return d
+
 def config_dict_mangle_acme(name, cli_dict):
     """
     Load CLI PKI dictionary and if an ACME certificate is used, load it's content
@@ -140,6 +155,10 @@ def __init__(self, session_env=None, config_source=None):
 
         self._level = []
         self._dict_cache = {}
+        self._top_dict_cache = {}
+        self._config_dict_cache = {}
+        self._config_dict_cache_hits = 0
+        self._config_dict_cache_misses = 0
         self.dependency_list = []
         (self._running_config,
          self._session_config) = self._config_source.get_configtree_tuple()
@@ -279,6 +298,41 @@ def get_cached_root_dict(self, effective=False):
 
         return config_dict
 
+    def get_config_dict_cache_stats(self) -> dict:
+        """
+        Returns:
+            dict: hit and miss counters of the get_config_dict result cache
+        """
+        return {'hits': self._config_dict_cache_hits,
+                'misses': self._config_dict_cache_misses,
+                'entries': len(self._config_dict_cache)}
+
+    def _get_cached_path_root(self, lpath, effective=False):
+        """
+        Return a root dict holding at least the top-level node of lpath.
+
+        Unless the complete root dict has already been built, only the
+        subtree of the top-level node is serialized and decoded, so
+        requests for a single subtree do not pay for the whole config.
+        """
+        if not lpath:
+            return self.get_cached_root_dict(effective)
+
+        root_dict = self._dict_cache.get(effective, {})
+        if root_dict:
+            return root_dict
+
+        top = lpath[0]
+        cache = self._top_dict_cache.setdefault(effective, {})
+        if top not in cache:
+            config = self.get_config_tree(effective)
+            if config and config.exists([top]):
+                cache[top] = {top: config.to_dict([top])}
+            else:
+                cache[top] = {}
+
+        return cache[top]
+
     def verify_mangling(self, key_mangling):
         if not (isinstance(key_mangling, tuple) and \
                 (len(key_mangling) == 2) and \
@@ -301,7 +355,43 @@ def get_config_dict(self, path=[], effective=False, key_mangling=None,
             no_multi_convert=False: if convert, return single value of multi node as list
 
         Returns: a dict representation of the config under path
+
+        Note:
+            Results are cached for the lifetime of the Config object, which
+            in vyos-configd is shared by all scripts of one commit. Each
+            call returns a private copy, so callers may modify it freely.
         """
+        lpath = self._make_path(path)
+        if no_multi_convert and key_mangling is None and not \
+                (with_defaults or with_recursive_defaults or with_pki):
+            # a plain sub-dict of the cached root dict, nothing to save
+            return self._get_config_dict(path, effective, key_mangling,
+                                         get_first_key, no_multi_convert,
+                                         no_tag_node_value_mangle,
+                                         with_defaults,
+                                         with_recursive_defaults, with_pki)
+
+        cache_key = (tuple(lpath), effective, key_mangling, get_first_key,
+                     no_multi_convert, no_tag_node_value_mangle,
+                     with_defaults, with_recursive_defaults, with_pki)
+        conf_dict = self._config_dict_cache.get(cache_key)
+        if conf_dict is None:
+            self._config_dict_cache_misses += 1
+            conf_dict = self._get_config_dict(path, effective, key_mangling,
+                                              get_first_key, no_multi_convert,
+                                              no_tag_node_value_mangle,
+                                              with_defaults,
+                                              with_recursive_defaults,
+                                              with_pki)
+            self._config_dict_cache[cache_key] = conf_dict
+        else:
+            self._config_dict_cache_hits += 1
+
+        return _copy_config_dict(conf_dict)
+
+    def _get_config_dict(self, path, effective, key_mangling, get_first_key,
+                         no_multi_convert, no_tag_node_value_mangle,
+                         with_defaults, with_recursive_defaults, with_pki):
         kwargs = locals().copy()
         del kwargs['self']
         del kwargs['no_multi_convert']
@@ -310,7 +400,7 @@ def get_config_dict(self, path=[], effective=False, key_mangling=None,
         del kwargs['with_pki']
 
         lpath = self._make_path(path)
-        root_dict = self.get_cached_root_dict(effective)
+        root_dict = self._get_cached_path_root(lpath, effective)
         conf_dict = get_sub_dict(root_dict, lpath, get_first_key=get_first_key)
 
         rpath = lpath if get_first_key else lpath[:-1]
@@ -344,7 +434,8 @@ def get_config_dict(self, path=[], effective=False, key_mangling=None,
 
             conf_dict['pki'] = pki_dict
 
-        interfaces_root = root_dict.get('interfaces', {})
+        interfaces_root = self._get_cached_path_root(['interfaces'],
+                                                     effective).get('interfaces', {})
         setattr(conf_dict, 'interfaces_root', interfaces_root)
 
         # save optional args for a call to get_config_defaults
@@ -356,7 +447,7 @@ def get_config_defaults(self, path=[], effective=False, key_mangling=None,
                             no_tag_node_value_mangle=False, get_first_key=False,
                             recursive=False) -> dict:
         lpath = self._make_path(path)
-        root_dict = self.get_cached_root_dict(effective)
+        root_dict = self._get_cached_path_root(lpath, effective)
         conf_dict = get_sub_dict(root_dict, lpath, get_first_key)
 
         defaults = relative_defaults(lpath, conf_dict,
@@ -396,7 +487,7 @@ def is_multi(self, path):
         Note:
             It also returns False if node doesn't exist.
         """
-        self._config_source.set_level(self.get_level)
+        self._config_source.set_level(self.get_level())
         return self._config_source.is_multi(path)
 
     def is_tag(self, path):
@@ -410,7 +501,7 @@ def is_tag(self, path):
         Note:
             It also returns False if node doesn't exist.
         """
-        self._config_source.set_level(self.get_level)
+        self._config_source.set_level(self.get_level())
         return self._config_source.is_tag(path)
 
     def is_leaf(self, path):
@@ -424,7 +515,7 @@ def is_leaf(self, path):
         Note:
             It also returns False if node doesn't exist.
         """
-        self._config_source.set_level(self.get_level)
+        self._config_source.set_level(self.get_level())
         return self._config_source.is_leaf(path)
 
     def return_value(self, path, default=None):
@@ -188,6 +188,39 @@ def graph_from_dependency_dict(d: dict) -> dict:
 
     return g
 
+def dependency_participants(d: dict) -> set[str]:
+    """Return the canonical names of all scripts that either set
+    dependents or are called as dependents of another script
+    """
+    g = graph_from_dependency_dict(d)
+    res = set()
+    for k, v in g.items():
+        res.add(canon_name(k))
+        res |= {canon_name(t) for t in v}
+
+    return res
+
+def priority_tiers(scripts: list[tuple[int, str]],
+                   serial: set[str] = None) -> list[list[str]]:
+    """Group (priority, script) pairs into tiers of scripts of equal
+    priority, in priority order, whose get_config/verify phases may run
+    concurrently; a script listed in serial always forms a tier of its own
+    """
+    serial = serial if serial is not None else set()
+    tiers: list[list[str]] = []
+    shared: dict[int, list[str]] = {}
+
+    for prio, name in sorted(scripts, key=lambda x: x[0]):
+        if name in serial:
+            tiers.append([name])
+            continue
+        if prio not in shared:
+            shared[prio] = []
+            tiers.append(shared[prio])
+        shared[prio].append(name)
+
+    return tiers
+
 def is_acyclic(d: dict) -> bool:
     g = graph_from_dependency_dict(d)
     ts = TopologicalSorter(g)
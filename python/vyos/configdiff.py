@@ -71,6 +71,14 @@ def _dict_from_key_set(key_set, d):
 
     return ret
 
+def _get_diff_tree(config) -> DiffTree:
+    if hasattr(config, 'cached_diff_tree'):
+        return getattr(config, 'cached_diff_tree')
+
+    diff_t = DiffTree(config._running_config, config._session_config)
+    setattr(config, 'cached_diff_tree', diff_t)
+    return diff_t
+
 def get_config_diff(config, key_mangling=None):
     """
     Check type and return ConfigDiff instance.
@@ -83,11 +91,7 @@ def get_config_diff(config, key_mangling=None):
             isinstance(key_mangling[1], str)):
         raise ValueError("key_mangling must be a tuple of two strings")
 
-    if hasattr(config, 'cached_diff_tree'):
-        diff_t = getattr(config, 'cached_diff_tree')
-    else:
-        diff_t = DiffTree(config._running_config, config._session_config)
-        setattr(config, 'cached_diff_tree', diff_t)
+    diff_t = _get_diff_tree(config)
 
     if hasattr(config, 'cached_diff_dict'):
         diff_d = getattr(config, 'cached_diff_dict')
@@ -112,10 +116,12 @@ def get_commit_scripts(config) -> list:
     if hasattr(config, 'commit_scripts'):
         return getattr(config, 'commit_scripts')
 
-    D = get_config_diff(config)
-    d = D._diff_dict
+    # Only the changed paths are decoded, not the complete session and
+    # running config as a ConfigDiff would
+    diff_t = _get_diff_tree(config)
     s = set()
-    for p in chain(dict_to_key_paths(d['sub']), dict_to_key_paths(d['add'])):
+    for p in chain(dict_to_key_paths(diff_t.sub.to_dict()),
+                   dict_to_key_paths(diff_t.add.to_dict())):
         p_owner = owner(p, with_tag=True)
         if not p_owner:
             continue
@@ -129,8 +135,22 @@ def get_commit_scripts(config) -> list:
     res = [x[1] for x in sorted(s, key=lambda x: x[0])]
     setattr(config, 'commit_scripts', res)
 
+    prio: dict[str, int] = {}
+    for p_priority, p_owner in s:
+        prio[p_owner] = min(p_priority, prio.get(p_owner, p_priority))
+    setattr(config, 'commit_script_priorities', prio)
+
     return res
 
+def get_commit_script_priorities(config) -> dict:
+    """Return a dict of the config scripts to be executed by commit,
+    mapped to their priority
+    """
+    if not hasattr(config, 'commit_script_priorities'):
+        get_commit_scripts(config)
+
+    return getattr(config, 'commit_script_priorities', {})
+
 class ConfigDiff(object):
     """
     The class of config changes as represented by comparison between the
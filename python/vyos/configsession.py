@@ -29,6 +29,12 @@
 COMMIT = '/opt/vyatta/sbin/my_commit'
 DISCARD = '/opt/vyatta/sbin/my_discard'
 SHOW_CONFIG = ['/bin/cli-shell-api', 'showConfig']
+SHOW_WORKING_CONFIG = [
+    '/bin/cli-shell-api',
+    '--show-working-only',
+    '--show-ignore-edit',
+    'showConfig',
+]
 LOAD_CONFIG = ['/bin/cli-shell-api', 'loadFile']
 MIGRATE_LOAD_CONFIG = ['/usr/libexec/vyos/vyos-load-config.py']
 SAVE_CONFIG = ['/usr/libexec/vyos/vyos-save-config.py']
@@ -277,6 +283,20 @@ def load_config(self, file_path):
         out = self.__run_command(LOAD_CONFIG + [file_path])
         return out
 
+    def get_working_config(self):
+        """Return the session working config, including uncommitted changes"""
+        return self.__run_command(SHOW_WORKING_CONFIG)
+
+    def load_config_tree(self, config_tree):
+        """Replace the session working config with a ConfigTree in one load,
+        instead of one set/delete call per path"""
+        from tempfile import NamedTemporaryFile
+
+        with NamedTemporaryFile('w', prefix='vyos-load-', suffix='.config') as f:
+            f.write(config_tree.to_string())
+            f.flush()
+            return self.load_config(f.name)
+
     def load_explicit(self, file_path):
         from vyos.load_config import load
         from vyos.load_config import LoadConfigError
@@ -1,5 +1,5 @@
 
-# Copyright 2020-2023 VyOS maintainers and contributors <maintainers@vyos.io>
+# Copyright 2020-2024 VyOS maintainers and contributors <maintainers@vyos.io>
 #
 # This library is free software; you can redistribute it and/or
 # modify it under the terms of the GNU Lesser General Public
@@ -20,6 +20,7 @@
 
 from vyos.configtree import ConfigTree
 from vyos.utils.boot import boot_configuration_complete
+from vyos.xml_ref import load_reference
 
 class VyOSError(Exception):
     """
@@ -110,6 +111,8 @@ def __init__(self, session_env=None):
         super().__init__()
         self._cli_shell_api = "/bin/cli-shell-api"
         self._level = []
+        self._in_session = None
+        self._edit_reset_env = None
         if session_env:
             self.__session_env = session_env
         else:
@@ -151,6 +154,26 @@ def _make_command(self, op, path):
         cmd = [self._cli_shell_api, op] + args
         return cmd
 
+    def _reference_query(self, query, path):
+        """
+        Answer a schema question (is_multi, is_tag, is_leaf) from the XML
+        reference cache, without a cli-shell-api process per call.
+
+        Returns:
+            bool: answer, or None if the reference cache is unavailable
+        """
+        try:
+            xml = load_reference()
+        except (ImportError, ValueError):
+            return None
+
+        ref_path = self._level + path.split()
+        try:
+            return getattr(xml, query)(ref_path)
+        except ValueError:
+            # non-existent path
+            return False
+
     def _run(self, cmd):
         if self.__session_env:
             p = subprocess.Popen(cmd, stdout=subprocess.PIPE, env=self.__session_env)
@@ -206,11 +229,15 @@ def in_session(self):
         """
         if os.getenv('VYOS_CONFIGD', ''):
             return False
-        try:
-            self._run(self._make_command('inSession', ''))
-            return True
-        except VyOSError:
-            return False
+        # session membership does not change during the lifetime of the
+        # process, ask cli-shell-api only once
+        if self._in_session is None:
+            try:
+                self._run(self._make_command('inSession', ''))
+                self._in_session = True
+            except VyOSError:
+                self._in_session = False
+        return self._in_session
 
     def show_config(self, path=[], default=None, effective=False):
         """
@@ -227,10 +254,11 @@ def show_config(self, path=[], default=None, effective=False):
         # restore original on exit.
         save_env = self.__session_env
 
-        env_str = self._run(self._make_command('getEditResetEnv', ''))
-        env_list = re.findall(r'([A-Z_]+)=\'([^;\s]+)\'', env_str)
+        if self._edit_reset_env is None:
+            env_str = self._run(self._make_command('getEditResetEnv', ''))
+            self._edit_reset_env = re.findall(r'([A-Z_]+)=\'([^;\s]+)\'', env_str)
         root_env = os.environ
-        for k, v in env_list:
+        for k, v in self._edit_reset_env:
             root_env[k] = v
 
         self.__session_env = root_env
@@ -267,6 +295,9 @@ def is_multi(self, path):
         Note:
             It also returns False if node doesn't exist.
         """
+        res = self._reference_query('is_multi', path)
+        if res is not None:
+            return res
         try:
             path = " ".join(self._level) + " " + path
             self._run(self._make_command('isMulti', path))
@@ -285,6 +316,9 @@ def is_tag(self, path):
         Note:
             It also returns False if node doesn't exist.
         """
+        res = self._reference_query('is_tag', path)
+        if res is not None:
+            return res
         try:
             path = " ".join(self._level) + " " + path
             self._run(self._make_command('isTag', path))
@@ -303,6 +337,9 @@ def is_leaf(self, path):
         Note:
             It also returns False if node doesn't exist.
         """
+        res = self._reference_query('is_leaf', path)
+        if res is not None:
+            return res
         try:
             path = " ".join(self._level) + " " + path
             self._run(self._make_command('isLeaf', path))
@@ -319,3 +356,22 @@ def __init__(self, running_config_text=None, session_config_text=None):
             self._session_config = ConfigTree(session_config_text) if session_config_text else None
         except ValueError:
             raise ConfigSourceError(f"Init error in {type(self)}")
+
+class ConfigSourceTree(ConfigSource):
+    def __init__(self, running_config=None, session_config=None):
+        """
+        Config source from already parsed ConfigTree objects, for callers
+        that keep trees around between invocations (e.g., vyos-configd)
+
+        Args:
+            running_config (ConfigTree): running (active) config, or None
+            session_config (ConfigTree): session (working) config, or None
+        """
+        super().__init__()
+
+        for tree in (running_config, session_config):
+            if tree is not None and not isinstance(tree, ConfigTree):
+                raise ConfigSourceError(f"Init error in {type(self)}")
+
+        self._running_config = running_config
+        self._session_config = session_config
@@ -21,6 +21,58 @@
 
 LIBPATH = '/usr/lib/libvyosconfig.so.0'
 
+# libvyosconfig function prototypes: name -> (argtypes, restype)
+_prototypes = {
+    'from_string': ([c_char_p], c_void_p),
+    'get_error': ([], c_char_p),
+    'to_string': ([c_void_p, c_bool], c_char_p),
+    'to_commands': ([c_void_p, c_char_p], c_char_p),
+    'to_json': ([c_void_p], c_char_p),
+    'to_json_ast': ([c_void_p], c_char_p),
+    'create_node': ([c_void_p, c_char_p], c_int),
+    'set_add_value': ([c_void_p, c_char_p, c_char_p], c_int),
+    'delete_value': ([c_void_p, c_char_p, c_char_p], c_int),
+    'delete_node': ([c_void_p, c_char_p], c_int),
+    'rename_node': ([c_void_p, c_char_p, c_char_p], c_int),
+    'copy_node': ([c_void_p, c_char_p, c_char_p], c_int),
+    'set_replace_value': ([c_void_p, c_char_p, c_char_p], c_int),
+    'set_valueless': ([c_void_p, c_char_p], c_int),
+    'exists': ([c_void_p, c_char_p], c_int),
+    'list_nodes': ([c_void_p, c_char_p], c_char_p),
+    'return_value': ([c_void_p, c_char_p], c_char_p),
+    'return_values': ([c_void_p, c_char_p], c_char_p),
+    'is_tag': ([c_void_p, c_char_p], c_int),
+    'set_tag': ([c_void_p, c_char_p, c_bool], c_int),
+    'is_leaf': ([c_void_p, c_char_p], c_bool),
+    'set_leaf': ([c_void_p, c_char_p, c_bool], c_int),
+    'get_subtree': ([c_void_p, c_char_p], c_void_p),
+    'destroy': ([c_void_p], None),
+    'show_diff': ([c_bool, c_char_p, c_void_p, c_void_p], c_char_p),
+    'tree_union': ([c_void_p, c_void_p], c_void_p),
+    'mask_tree': ([c_void_p, c_void_p], c_void_p),
+    'reference_tree_to_json': ([c_char_p, c_char_p], c_int),
+    'diff_tree': ([c_char_p, c_void_p, c_void_p], c_void_p),
+}
+
+_libraries = {}
+
+def load_library(libpath=LIBPATH):
+    """Return the libvyosconfig binding for libpath; the library is loaded
+    and the prototypes are declared once per process, not once per tree"""
+    lib = _libraries.get(libpath)
+    if lib is None:
+        lib = cdll.LoadLibrary(libpath)
+        for name, (argtypes, restype) in _prototypes.items():
+            try:
+                func = getattr(lib, name)
+            except AttributeError:
+                # older library version, calls to it fail as before
+                continue
+            func.argtypes = argtypes
+            func.restype = restype
+        _libraries[libpath] = lib
+    return lib
+
 def replace_backslash(s, search, replace):
     """Modify quoted strings containing backslashes not of escape sequences"""
     def replace_method(match):
@@ -61,110 +113,14 @@ def __init__(self, config_string=None, address=None, libpath=LIBPATH):
         if config_string is None and address is None:
             raise TypeError("ConfigTree() requires one of 'config_string' or 'address'")
         self.__config = None
-        self.__lib = cdll.LoadLibrary(libpath)
-
-        # Import functions
-        self.__from_string = self.__lib.from_string
-        self.__from_string.argtypes = [c_char_p]
-        self.__from_string.restype = c_void_p
-
-        self.__get_error = self.__lib.get_error
-        self.__get_error.argtypes = []
-        self.__get_error.restype = c_char_p
-
-        self.__to_string = self.__lib.to_string
-        self.__to_string.argtypes = [c_void_p, c_bool]
-        self.__to_string.restype = c_char_p
-
-        self.__to_commands = self.__lib.to_commands
-        self.__to_commands.argtypes = [c_void_p, c_char_p]
-        self.__to_commands.restype = c_char_p
-
-        self.__to_json = self.__lib.to_json
-        self.__to_json.argtypes = [c_void_p]
-        self.__to_json.restype = c_char_p
-
-        self.__to_json_ast = self.__lib.to_json_ast
-        self.__to_json_ast.argtypes = [c_void_p]
-        self.__to_json_ast.restype = c_char_p
-
-        self.__create_node = self.__lib.create_node
-        self.__create_node.argtypes = [c_void_p, c_char_p]
-        self.__create_node.restype = c_int
-
-        self.__set_add_value = self.__lib.set_add_value
-        self.__set_add_value.argtypes = [c_void_p, c_char_p, c_char_p]
-        self.__set_add_value.restype = c_int
-
-        self.__delete_value = self.__lib.delete_value
-        self.__delete_value.argtypes = [c_void_p, c_char_p, c_char_p]
-        self.__delete_value.restype = c_int
-
-        self.__delete = self.__lib.delete_node
-        self.__delete.argtypes = [c_void_p, c_char_p]
-        self.__delete.restype = c_int
-
-        self.__rename = self.__lib.rename_node
-        self.__rename.argtypes = [c_void_p, c_char_p, c_char_p]
-        self.__rename.restype = c_int
-
-        self.__copy = self.__lib.copy_node
-        self.__copy.argtypes = [c_void_p, c_char_p, c_char_p]
-        self.__copy.restype = c_int
-
-        self.__set_replace_value = self.__lib.set_replace_value
-        self.__set_replace_value.argtypes = [c_void_p, c_char_p, c_char_p]
-        self.__set_replace_value.restype = c_int
-
-        self.__set_valueless = self.__lib.set_valueless
-        self.__set_valueless.argtypes = [c_void_p, c_char_p]
-        self.__set_valueless.restype = c_int
-
-        self.__exists = self.__lib.exists
-        self.__exists.argtypes = [c_void_p, c_char_p]
-        self.__exists.restype = c_int
-
-        self.__list_nodes = self.__lib.list_nodes
-        self.__list_nodes.argtypes = [c_void_p, c_char_p]
-        self.__list_nodes.restype = c_char_p
-
-        self.__return_value = self.__lib.return_value
-        self.__return_value.argtypes = [c_void_p, c_char_p]
-        self.__return_value.restype = c_char_p
-
-        self.__return_values = self.__lib.return_values
-        self.__return_values.argtypes = [c_void_p, c_char_p]
-        self.__return_values.restype = c_char_p
-
-        self.__is_tag = self.__lib.is_tag
-        self.__is_tag.argtypes = [c_void_p, c_char_p]
-        self.__is_tag.restype = c_int
-
-        self.__set_tag = self.__lib.set_tag
-        self.__set_tag.argtypes = [c_void_p, c_char_p, c_bool]
-        self.__set_tag.restype = c_int
-
-        self.__is_leaf = self.__lib.is_leaf
-        self.__is_leaf.argtypes = [c_void_p, c_char_p]
-        self.__is_leaf.restype = c_bool
-
-        self.__set_leaf = self.__lib.set_leaf
-        self.__set_leaf.argtypes = [c_void_p, c_char_p, c_bool]
-        self.__set_leaf.restype = c_int
-
-        self.__get_subtree = self.__lib.get_subtree
-        self.__get_subtree.argtypes = [c_void_p, c_char_p]
-        self.__get_subtree.restype = c_void_p
-
-        self.__destroy = self.__lib.destroy
-        self.__destroy.argtypes = [c_void_p]
+        self.__lib = load_library(libpath)
 
         if address is None:
             config_section, version_section = extract_version(config_string)
             config_section = escape_backslash(config_section)
-            config = self.__from_string(config_section.encode())
+            config = self.__lib.from_string(config_section.encode())
             if config is None:
-                msg = self.__get_error().decode()
+                msg = self.__lib.get_error().decode()
                 raise ValueError("Failed to parse config: {0}".format(msg))
             else:
                 self.__config = config
@@ -179,7 +135,7 @@ def __init__(self, config_string=None, address=None, libpath=LIBPATH):
 
     def __del__(self):
         if self.__config is not None:
-            self.__destroy(self.__config)
+            self.__lib.destroy(self.__config)
 
     def __str__(self):
         return self.to_string()
@@ -191,7 +147,7 @@ def get_version_string(self):
         return self.__version
 
     def to_string(self, ordered_values=False, no_version=False):
-        config_string = self.__to_string(self.__config, ordered_values).decode()
+        config_string = self.__lib.to_string(self.__config, ordered_values).decode()
         config_string = unescape_backslash(config_string)
         if no_version:
             return config_string
@@ -199,21 +155,43 @@ def to_string(self, ordered_values=False, no_version=False):
         return config_string
 
     def to_commands(self, op="set"):
-        commands = self.__to_commands(self.__config, op.encode()).decode()
+        commands = self.__lib.to_commands(self.__config, op.encode()).decode()
         commands = unescape_backslash(commands)
         return commands
 
     def to_json(self):
-        return self.__to_json(self.__config).decode()
+        return self.__lib.to_json(self.__config).decode()
+
+    def to_dict(self, path=[]):
+        """Return the config below path as native Python types.
+
+        For a non-empty path only the subtree is serialized, so the cost
+        is proportional to the size of the subtree, not of the whole
+        config.
+        """
+        check_path(path)
+        if not path:
+            return json.loads(self.to_json())
+
+        if not self.exists(path):
+            raise ConfigTreeError(f"Path [{path}] doesn't exist")
+
+        if self.is_leaf(path):
+            values = self.return_values(path)
+            if not values:
+                return {}
+            return values[0] if len(values) == 1 else values
+
+        return json.loads(self.get_subtree(path).to_json())
 
     def to_json_ast(self):
-        return self.__to_json_ast(self.__config).decode()
+        return self.__lib.to_json_ast(self.__config).decode()
 
     def create_node(self, path):
         check_path(path)
         path_str = " ".join(map(str, path)).encode()
 
-        res = self.__create_node(self.__config, path_str)
+        res = self.__lib.create_node(self.__config, path_str)
         if (res != 0):
             raise ConfigTreeError(f"Path already exists: {path}")
 
@@ -230,12 +208,12 @@ def set(self, path, value=None, replace=True):
         path_str = " ".join(map(str, path)).encode()
 
         if value is None:
-            self.__set_valueless(self.__config, path_str)
+            self.__lib.set_valueless(self.__config, path_str)
         else:
             if replace:
-                self.__set_replace_value(self.__config, path_str, str(value).encode())
+                self.__lib.set_replace_value(self.__config, path_str, str(value).encode())
             else:
-                self.__set_add_value(self.__config, path_str, str(value).encode())
+                self.__lib.set_add_value(self.__config, path_str, str(value).encode())
 
         if self.__migration:
             self.migration_log.info(f"- op: set path: {path} value: {value} replace: {replace}")
@@ -244,7 +222,7 @@ def delete(self, path):
         check_path(path)
         path_str = " ".join(map(str, path)).encode()
 
-        res = self.__delete(self.__config, path_str)
+        res = self.__lib.delete_node(self.__config, path_str)
         if (res != 0):
             raise ConfigTreeError(f"Path doesn't exist: {path}")
 
@@ -255,7 +233,7 @@ def delete_value(self, path, value):
         check_path(path)
         path_str = " ".join(map(str, path)).encode()
 
-        res = self.__delete_value(self.__config, path_str, value.encode())
+        res = self.__lib.delete_value(self.__config, path_str, value.encode())
         if (res != 0):
             if res == 1:
                 raise ConfigTreeError(f"Path doesn't exist: {path}")
@@ -276,7 +254,7 @@ def rename(self, path, new_name):
         new_path = path[:-1] + [new_name]
         if self.exists(new_path):
             raise ConfigTreeError()
-        res = self.__rename(self.__config, path_str, newname_str)
+        res = self.__lib.rename_node(self.__config, path_str, newname_str)
         if (res != 0):
             raise ConfigTreeError("Path [{}] doesn't exist".format(path))
 
@@ -292,9 +270,9 @@ def copy(self, old_path, new_path):
         # Check if a node with intended new name already exists
         if self.exists(new_path):
             raise ConfigTreeError()
-        res = self.__copy(self.__config, oldpath_str, newpath_str)
+        res = self.__lib.copy_node(self.__config, oldpath_str, newpath_str)
         if (res != 0):
-            msg = self.__get_error().decode()
+            msg = self.__lib.get_error().decode()
             raise ConfigTreeError(msg)
 
         if self.__migration:
@@ -304,7 +282,7 @@ def exists(self, path):
         check_path(path)
         path_str = " ".join(map(str, path)).encode()
 
-        res = self.__exists(self.__config, path_str)
+        res = self.__lib.exists(self.__config, path_str)
         if (res == 0):
             return False
         else:
@@ -314,7 +292,7 @@ def list_nodes(self, path, path_must_exist=True):
         check_path(path)
         path_str = " ".join(map(str, path)).encode()
 
-        res_json = self.__list_nodes(self.__config, path_str).decode()
+        res_json = self.__lib.list_nodes(self.__config, path_str).decode()
         res = json.loads(res_json)
 
         if res is None:
@@ -329,7 +307,7 @@ def return_value(self, path):
         check_path(path)
         path_str = " ".join(map(str, path)).encode()
 
-        res_json = self.__return_value(self.__config, path_str).decode()
+        res_json = self.__lib.return_value(self.__config, path_str).decode()
         res = json.loads(res_json)
 
         if res is None:
@@ -341,7 +319,7 @@ def return_values(self, path):
         check_path(path)
         path_str = " ".join(map(str, path)).encode()
 
-        res_json = self.__return_values(self.__config, path_str).decode()
+        res_json = self.__lib.return_values(self.__config, path_str).decode()
         res = json.loads(res_json)
 
         if res is None:
@@ -349,11 +327,51 @@ def return_values(self, path):
         else:
             return res
 
+    def exists_many(self, paths):
+        """Return a list with the result of exists() for every path"""
+        exists = self.__lib.exists
+        config = self.__config
+        res = []
+        for path in paths:
+            check_path(path)
+            res.append(exists(config, " ".join(map(str, path)).encode()) != 0)
+        return res
+
+    def list_nodes_many(self, paths, path_must_exist=True):
+        """Return a list with the result of list_nodes() for every path"""
+        list_nodes = self.__lib.list_nodes
+        config = self.__config
+        res = []
+        for path in paths:
+            check_path(path)
+            path_str = " ".join(map(str, path)).encode()
+            nodes = json.loads(list_nodes(config, path_str).decode())
+            if nodes is None:
+                if path_must_exist:
+                    raise ConfigTreeError("Path [{}] doesn't exist".format(path_str))
+                nodes = []
+            res.append(nodes)
+        return res
+
+    def return_values_many(self, paths):
+        """Return a list with the result of return_values() for every path"""
+        return_values = self.__lib.return_values
+        config = self.__config
+        res = []
+        for path in paths:
+            check_path(path)
+            path_str = " ".join(map(str, path)).encode()
+            values = json.loads(return_values(config, path_str).decode())
+            if values is None:
+                raise ConfigTreeError("Path [{}] doesn't exist".format(path_str))
+            res.append(values)
+        return res
+
     def is_tag(self, path):
         check_path(path)
         path_str = " ".join(map(str, path)).encode()
 
-        res = self.__is_tag(self.__config, path_str)
+        res = self.__lib.is_tag(self.__config, path_str)
         if (res >= 1):
             return True
         else:
@@ -363,7 +381,7 @@ def set_tag(self, path, value=True):
         check_path(path)
         path_str = " ".join(map(str, path)).encode()
 
-        res = self.__set_tag(self.__config, path_str, value)
+        res = self.__lib.set_tag(self.__config, path_str, value)
         if (res == 0):
             return True
         else:
@@ -373,13 +391,13 @@ def is_leaf(self, path):
         check_path(path)
         path_str = " ".join(map(str, path)).encode()
 
-        return self.__is_leaf(self.__config, path_str)
+        return self.__lib.is_leaf(self.__config, path_str)
 
     def set_leaf(self, path, value):
         check_path(path)
         path_str = " ".join(map(str, path)).encode()
 
-        res = self.__set_leaf(self.__config, path_str, value)
+        res = self.__lib.set_leaf(self.__config, path_str, value)
         if (res == 0):
             return True
         else:
@@ -389,7 +407,7 @@ def get_subtree(self, path, with_node=False):
         check_path(path)
         path_str = " ".join(map(str, path)).encode()
 
-        res = self.__get_subtree(self.__config, path_str, with_node)
+        res = self.__lib.get_subtree(self.__config, path_str, with_node)
         subt = ConfigTree(address=res)
         return subt
 
@@ -407,18 +425,12 @@ def show_diff(left, right, path=[], commands=False, libpath=LIBPATH):
     check_path(path)
     path_str = " ".join(map(str, path)).encode()
 
-    __lib = cdll.LoadLibrary(libpath)
-    __show_diff = __lib.show_diff
-    __show_diff.argtypes = [c_bool, c_char_p, c_void_p, c_void_p]
-    __show_diff.restype = c_char_p
-    __get_error = __lib.get_error
-    __get_error.argtypes = []
-    __get_error.restype = c_char_p
+    __lib = load_library(libpath)
 
-    res = __show_diff(commands, path_str, left._get_config(), right._get_config())
+    res = __lib.show_diff(commands, path_str, left._get_config(), right._get_config())
     res = res.decode()
     if res == "#1@":
-        msg = __get_error().decode()
+        msg = __lib.get_error().decode()
         raise ConfigTreeError(msg)
 
     res = unescape_backslash(res)
@@ -432,15 +444,9 @@ def union(left, right, libpath=LIBPATH):
     if not (isinstance(left, ConfigTree) and isinstance(right, ConfigTree)):
         raise TypeError("Arguments must be instances of ConfigTree")
 
-    __lib = cdll.LoadLibrary(libpath)
-    __tree_union = __lib.tree_union
-    __tree_union.argtypes = [c_void_p, c_void_p]
-    __tree_union.restype = c_void_p
-    __get_error = __lib.get_error
-    __get_error.argtypes = []
-    __get_error.restype = c_char_p
+    __lib = load_library(libpath)
 
-    res = __tree_union( left._get_config(), right._get_config())
+    res = __lib.tree_union( left._get_config(), right._get_config())
     tree = ConfigTree(address=res)
 
     return tree
@@ -450,19 +456,12 @@ def mask_inclusive(left, right, libpath=LIBPATH):
         raise TypeError("Arguments must be instances of ConfigTree")
 
     try:
-        __lib = cdll.LoadLibrary(libpath)
-        __mask_tree = __lib.mask_tree
-        __mask_tree.argtypes = [c_void_p, c_void_p]
-        __mask_tree.restype = c_void_p
-        __get_error = __lib.get_error
-        __get_error.argtypes = []
-        __get_error.restype = c_char_p
-
-        res = __mask_tree(left._get_config(), right._get_config())
+        __lib = load_library(libpath)
+        res = __lib.mask_tree(left._get_config(), right._get_config())
     except Exception as e:
         raise ConfigTreeError(e)
     if not res:
-        msg = __get_error().decode()
+        msg = __lib.get_error().decode()
         raise ConfigTreeError(msg)
 
     tree = ConfigTree(address=res)
@@ -471,17 +470,12 @@ def mask_inclusive(left, right, libpath=LIBPATH):
 
 def reference_tree_to_json(from_dir, to_file, libpath=LIBPATH):
     try:
-        __lib = cdll.LoadLibrary(libpath)
-        __reference_tree_to_json = __lib.reference_tree_to_json
-        __reference_tree_to_json.argtypes = [c_char_p, c_char_p]
-        __get_error = __lib.get_error
-        __get_error.argtypes = []
-        __get_error.restype = c_char_p
-        res = __reference_tree_to_json(from_dir.encode(), to_file.encode())
+        __lib = load_library(libpath)
+        res = __lib.reference_tree_to_json(from_dir.encode(), to_file.encode())
     except Exception as e:
         raise ConfigTreeError(e)
     if res == 1:
-        msg = __get_error().decode()
+        msg = __lib.get_error().decode()
         raise ConfigTreeError(msg)
 
 class DiffTree:
@@ -501,20 +495,17 @@ def __init__(self, left, right, path=[], libpath=LIBPATH):
         self.left = left
         self.right = right
 
-        self.__lib = cdll.LoadLibrary(libpath)
-
-        self.__diff_tree = self.__lib.diff_tree
-        self.__diff_tree.argtypes = [c_char_p, c_void_p, c_void_p]
-        self.__diff_tree.restype = c_void_p
+        self.__lib = load_library(libpath)
 
         check_path(path)
         path_str = " ".join(map(str, path)).encode()
 
-        res = self.__diff_tree(path_str, left._get_config(), right._get_config())
+        res = self.__lib.diff_tree(path_str, left._get_config(), right._get_config())
 
-        # full diff config_tree and python dict representation
+        # full diff config_tree; the python dict representation is only
+        # built on first use
         self.full = ConfigTree(address=res)
-        self.dict = json.loads(self.full.to_json())
+        self._dict = None
 
         # config_tree sub-trees
         self.add = self.full.get_subtree(['add'])
@@ -522,13 +513,19 @@ def __init__(self, left, right, path=[], libpath=LIBPATH):
         self.inter = self.full.get_subtree(['inter'])
         self.delete = self.full.get_subtree(['del'])
 
+    @property
+    def dict(self):
+        if self._dict is None:
+            self._dict = json.loads(self.full.to_json())
+        return self._dict
+
     def to_commands(self):
         add = self.add.to_commands()
         delete = self.delete.to_commands(op="delete")
         return delete + "\n" + add
 
 def deep_copy(config_tree: ConfigTree) -> ConfigTree:
-    """An inelegant, but reasonably fast, copy; replace with backend copy
+    """Copy by merging into an empty tree; unlike a diff against an empty
+    tree this builds the result in a single pass and creates no sub-trees
     """
-    D = DiffTree(None, config_tree)
-    return D.add
+    return union(None, config_tree)
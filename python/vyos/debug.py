@@ -63,6 +63,7 @@ def enabled(flag):
      - ifconfig: when modifying an interface,
        prints command with result and sysfs access on stdout for interface
      - command: print command run with result
+     - timing: print the wall time of every command run
 
     Having the flag setup on the filesystem is required to have
     debuging at boot time, however, setting the flag via environment
@@ -75,7 +76,7 @@ def enabled(flag):
 
     # this is to force all new flags to be registered here to be
     # documented both here and a reminder to update readthedocs :-)
-    if flag not in ['developer', 'log', 'ifconfig', 'command']:
+    if flag not in ['developer', 'log', 'ifconfig', 'command', 'timing']:
         return ''
 
     return _fromenv(flag) or _fromfile(flag)
@@ -49,6 +49,8 @@
 
 commit_lock = os.path.join(directories['vyos_configdir'], '.lock')
 
+commit_stamp = os.path.join(directories['vyos_configdir'], '.commit-stamp')
+
 component_version_json = os.path.join(directories['data'], 'component-versions.json')
 
 config_default = os.path.join(directories['data'], 'config.boot.default')
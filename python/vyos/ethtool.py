@@ -65,7 +65,7 @@ def __init__(self, ifname):
         if not interface_exists(ifname):
             raise ValueError(f'Interface "{ifname}" does not exist!')
 
-        out, _ = popen(f'ethtool --driver {ifname}')
+        out, _ = popen(f'ethtool --driver {ifname}', cache=True)
         driver = re.search(r'driver:\s(\w+)', out)
         if driver:
             self._driver_name = driver.group(1)
@@ -93,21 +93,21 @@ def __init__(self, ifname):
         #     "current-message-level": 7,
         #     "link-detected": true
         # } ]
-        out, _ = popen(f'ethtool --json {ifname}')
+        out, _ = popen(f'ethtool --json {ifname}', cache=True)
         self._base_settings = loads(out)[0]
 
         # Now populate driver features
-        out, _ = popen(f'ethtool --json --show-features {ifname}')
+        out, _ = popen(f'ethtool --json --show-features {ifname}', cache=True)
         self._features = loads(out)[0]
 
         # Get information about NIC ring buffers
-        out, err = popen(f'ethtool --json --show-ring {ifname}')
+        out, err = popen(f'ethtool --json --show-ring {ifname}', cache=True)
         if not bool(err):
             self._ring_buffer = loads(out)[0]
 
         # Get current flow control settings, but this is not supported by
         # all NICs (e.g. vmxnet3 does not support is)
-        out, err = popen(f'ethtool --json --show-pause {ifname}')
+        out, err = popen(f'ethtool --json --show-pause {ifname}', cache=True)
         if not bool(err):
             self._flow_control = loads(out)[0]
 
@@ -14,13 +14,19 @@
 
 import csv
 import gzip
+import json
+import mmap
 import os
 import re
+import struct
 
+from ipaddress import IPv4Address
+from ipaddress import IPv6Address
 from pathlib import Path
 from socket import AF_INET
 from socket import AF_INET6
 from socket import getaddrinfo
+from socket import inet_pton
 from time import strftime
 
 from vyos.remote import download
@@ -683,25 +689,77 @@ def parse_time(time):
 
 nftables_geoip_conf = '/run/nftables-geoip.conf'
 geoip_database = '/usr/share/vyos-geoip/dbip-country-lite.csv.gz'
+geoip_index = '/usr/share/vyos-geoip/dbip-country-lite.idx'
 geoip_lock_file = '/run/vyos-geoip.lock'
 
-def geoip_load_data(codes=[]):
-    data = None
-
-    if not os.path.exists(geoip_database):
-        return []
-
-    try:
-        with gzip.open(geoip_database, mode='rt') as csv_fh:
-            reader = csv.reader(csv_fh)
-            out = []
-            for start, end, code in reader:
-                if code.lower() in codes:
-                    out.append([start, end, code.lower()])
-            return out
-    except:
-        print('Error: Failed to open GeoIP database')
-    return []
+# Binary index layout, built once per database download:
+#   header:     magic, number of directory entries
+#   directory:  country code, address family, offset and count of ranges
+#   ranges:     sorted (start, end) pairs as big-endian integers
+geoip_index_magic = b'VYGEOIP1'
+geoip_index_header = struct.Struct('<8sI')
+geoip_index_entry = struct.Struct('<2sBxII')
+geoip_index_width = {4: 4, 6: 16}
+
+def geoip_build_index(database=geoip_database, index=geoip_index):
+    """ Convert the db-ip CSV database into a memory-mappable index keyed by
+    country code and address family """
+    ranges = {}
+    with gzip.open(database, mode='rt') as csv_fh:
+        for start, end, code in csv.reader(csv_fh):
+            family = 6 if ':' in start else 4
+            af = AF_INET6 if family == 6 else AF_INET
+            ranges.setdefault((code.lower(), family), []).append(
+                (inet_pton(af, start), inet_pton(af, end)))
+
+    directory = []
+    data = []
+    offset = 0
+    for (code, family), blocks in sorted(ranges.items()):
+        blocks.sort()
+        directory.append(geoip_index_entry.pack(code.encode()[:2], family, offset, len(blocks)))
+        for start, end in blocks:
+            data.append(start)
+            data.append(end)
+        offset += len(blocks) * geoip_index_width[family] * 2
+
+    tmp = f'{index}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(geoip_index_header.pack(geoip_index_magic, len(directory)))
+        f.write(b''.join(directory))
+        f.write(b''.join(data))
+    os.replace(tmp, index)
+
+def geoip_index_valid(database=geoip_database, index=geoip_index):
+    if not os.path.exists(index):
+        return False
+    return os.path.getmtime(index) >= os.path.getmtime(database)
+
+def geoip_load_ranges(codes=[], index=geoip_index):
+    """ Return {(code, family): [(start, end), ...]} with integer addresses for
+    the requested country codes, reading only their slices of the index """
+    out = {}
+    with open(index, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, entries = geoip_index_header.unpack_from(mm, 0)
+        if magic != geoip_index_magic:
+            raise ValueError(f'Invalid GeoIP index "{index}"')
+
+        base = geoip_index_header.size + entries * geoip_index_entry.size
+        for i in range(entries):
+            pos = geoip_index_header.size + i * geoip_index_entry.size
+            code, family, offset, count = geoip_index_entry.unpack_from(mm, pos)
+            code = code.decode()
+            if code not in codes:
+                continue
+
+            width = geoip_index_width[family]
+            start = base + offset
+            blob = mm[start:start + count * width * 2]
+            out[(code, family)] = [
+                (int.from_bytes(blob[j:j + width], 'big'),
+                 int.from_bytes(blob[j + width:j + width * 2], 'big'))
+                for j in range(0, len(blob), width * 2)]
+    return out
 
 def geoip_download_data():
     url = 'https://download.db-ip.com/free/dbip-country-lite-{}.csv.gz'.format(strftime("%Y-%m"))
@@ -712,10 +770,53 @@ def geoip_download_data():
 
         download(geoip_database, url)
         print("Downloaded GeoIP database")
-        return True
     except:
         print("Error: Failed to download GeoIP database")
-    return False
+        return False
+
+    try:
+        geoip_build_index()
+    except:
+        print("Error: Failed to build GeoIP database index")
+        return False
+    return True
+
+def geoip_range_str(family, ip_range):
+    to_addr = IPv6Address if family == 6 else IPv4Address
+    start, end = ip_range
+    if start == end:
+        return str(to_addr(start))
+    return f'{to_addr(start)}-{to_addr(end)}'
+
+def geoip_set_ranges(family, name):
+    """ Return the set of (start, end) integer ranges currently loaded into
+    the given nftables GeoIP set, or None if the set does not exist """
+    prefix = 'ip6' if family == 6 else 'ip'
+    to_addr = IPv6Address if family == 6 else IPv4Address
+    max_len = 128 if family == 6 else 32
+
+    try:
+        results = json.loads(cmd(f'nft -j list set {prefix} vyos_filter {name}'))
+    except:
+        return None
+
+    out = set()
+    for obj in results.get('nftables', []):
+        if 'set' not in obj:
+            continue
+        for elem in obj['set'].get('elem', []):
+            if isinstance(elem, dict) and 'elem' in elem:
+                elem = elem['elem']['val']
+            if isinstance(elem, str):
+                addr = int(to_addr(elem))
+                out.add((addr, addr))
+            elif 'prefix' in elem:
+                addr = int(to_addr(elem['prefix']['addr']))
+                out.add((addr, addr | ((1 << (max_len - elem['prefix']['len'])) - 1)))
+            elif 'range' in elem:
+                start, end = elem['range']
+                out.add((int(to_addr(start)), int(to_addr(end))))
+    return out
 
 class GeoIPLock(object):
     def __init__(self, file):
@@ -747,45 +848,54 @@ def geoip_update(firewall, force=False):
         elif force:
             geoip_download_data()
 
-        ipv4_codes = {}
-        ipv6_codes = {}
-
-        ipv4_sets = {}
-        ipv6_sets = {}
-
-        # Map country codes to set names
+        # Map country codes to set names per address family
+        set_codes = {4: {}, 6: {}}
         for codes, path in dict_search_recursive(firewall, 'country_code'):
-            set_name = f'GEOIP_CC_{path[1]}_{path[2]}_{path[4]}'
             if ( path[0] == 'ipv4'):
-                for code in codes:
-                    ipv4_codes.setdefault(code, []).append(set_name)
+                set_name = f'GEOIP_CC_{path[1]}_{path[2]}_{path[4]}'
+                set_codes[4].setdefault(set_name, set()).update(codes)
             elif ( path[0] == 'ipv6' ):
                 set_name = f'GEOIP_CC6_{path[1]}_{path[2]}_{path[4]}'
-                for code in codes:
-                    ipv6_codes.setdefault(code, []).append(set_name)
+                set_codes[6].setdefault(set_name, set()).update(codes)
 
-        if not ipv4_codes and not ipv6_codes:
+        if not set_codes[4] and not set_codes[6]:
             if force:
                 print("GeoIP not in use by firewall")
             return True
 
-        geoip_data = geoip_load_data([*ipv4_codes, *ipv6_codes])
+        try:
+            if not geoip_index_valid():
+                geoip_build_index()
+            all_codes = set().union(*set_codes[4].values(), *set_codes[6].values())
+            geoip_data = geoip_load_ranges(all_codes)
+        except:
+            print('Error: Failed to open GeoIP database')
+            return False
 
-        # Iterate IP blocks to assign to sets
-        for start, end, code in geoip_data:
-            ipv4 = is_ipv4(start)
-            if code in ipv4_codes and ipv4:
-                ip_range = f'{start}-{end}' if start != end else start
-                for setname in ipv4_codes[code]:
-                    ipv4_sets.setdefault(setname, []).append(ip_range)
-            if code in ipv6_codes and not ipv4:
-                ip_range = f'{start}-{end}' if start != end else start
-                for setname in ipv6_codes[code]:
-                    ipv6_sets.setdefault(setname, []).append(ip_range)
+        # Only push the difference between the wanted and the loaded set
+        # contents, a full reload of large sets takes tens of seconds
+        sets = {4: {}, 6: {}}
+        for family, family_sets in set_codes.items():
+            for set_name, codes in family_sets.items():
+                wanted = set()
+                for code in codes:
+                    wanted.update(geoip_data.get((code, family), []))
+
+                current = geoip_set_ranges(family, set_name) or set()
+                add = sorted(wanted - current)
+                delete = sorted(current - wanted)
+                if add or delete:
+                    sets[family][set_name] = {
+                        'add': [geoip_range_str(family, r) for r in add],
+                        'delete': [geoip_range_str(family, r) for r in delete]
+                    }
+
+        if not sets[4] and not sets[6]:
+            return True
 
         render(nftables_geoip_conf, 'firewall/nftables-geoip-update.j2', {
-            'ipv4_sets': ipv4_sets,
-            'ipv6_sets': ipv6_sets
+            'ipv4_sets': sets[4],
+            'ipv6_sets': sets[6]
         })
 
         result = run(f'nft --file {nftables_geoip_conf}')
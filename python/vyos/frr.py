@@ -65,6 +65,7 @@
 ```
 """
 
+import json
 import tempfile
 import re
 
@@ -92,6 +93,9 @@
 path_vtysh = '/usr/bin/vtysh'
 path_frr_reload = '/usr/lib/frr/frr-reload.py'
 path_config = '/run/frr'
+# Template output applied per daemon and section owner, and how FRR rendered
+# it afterwards - basis of incremental commits
+path_applied_state = '/run/frr/vyos-applied.json'
 
 default_add_before = r'(ip prefix-list .*|route-map .*|line vty|end)'
 
@@ -403,12 +407,198 @@ def _find_elements(config, pattern, start_at=0):
     return [i for i, element in enumerate(config[start_at:], start=0) if re.match(pattern + '$', element)]
 
 
+# Removing these lines makes FRR implicitly drop further configuration of the
+# same object, they can not be applied as a line by line difference
+_cascading_removals = [
+    r'neighbor \S+ (remote-as|interface|peer-group)\b.*',
+    r'vni \d+',
+    r'vrf \S+',
+]
+
+
+def _parse_sections(config):
+    '''Parse FRR configuration into nested sections by indentation
+    config:  (list) configuration lines
+
+    return:  dict mapping each (stripped) line to a dict of its sub-lines,
+             "!" separators, "exit*" context terminators and "end" are skipped
+    '''
+    root = {}
+    # stack of (indentation, section)
+    stack = [(-1, root)]
+    for line in config:
+        text = line.strip()
+        if not text or text == '!' or text == 'end':
+            continue
+        indent = len(line) - len(line.lstrip())
+        if text.startswith('exit'):
+            while len(stack) > 1 and stack[-1][0] >= indent:
+                stack.pop()
+            continue
+        while stack[-1][0] >= indent:
+            stack.pop()
+        section = stack[-1][1].setdefault(text, {})
+        stack.append((indent, section))
+    return root
+
+
+def _negate(line):
+    if line.startswith('no '):
+        return line[3:]
+    return f'no {line}'
+
+
+def _sections_to_lines(sections, path, added, indent=''):
+    out = []
+    for line, children in sections.items():
+        out.append(f'{indent}{line}')
+        added.append(path + (line,))
+        if children:
+            out.extend(_sections_to_lines(children, path + (line,), added, indent + ' '))
+            out.append(f'{indent}exit')
+    return out
+
+
+def _diff_sections(old, new, path, added, removed):
+    '''Return (commands, incremental) where commands are the vtysh config
+    lines transforming the old into the new sections and incremental tells
+    if these commands are known to be safe to apply line by line. Paths of
+    added and removed lines are appended to the given lists.
+    '''
+    indent = ' ' * len(path)
+    commands = []
+    incremental = True
+
+    # Remove what is gone first, a changed value is then re-added below
+    for line, children in old.items():
+        if line in new:
+            continue
+        if children:
+            # Contexts (e.g. interface, address-family) can not be negated
+            # without losing or leaving behind their sub-configuration
+            incremental = False
+        if any(re.fullmatch(pattern, line) for pattern in _cascading_removals):
+            incremental = False
+        commands.append(f'{indent}{_negate(line)}')
+        removed.append(path + (line,))
+
+    for line, children in new.items():
+        if line not in old:
+            commands.append(f'{indent}{line}')
+            added.append(path + (line,))
+            if children:
+                commands.extend(_sections_to_lines(children, path + (line,),
+                                                   added, indent + ' '))
+                commands.append(f'{indent}exit')
+        elif children or old[line]:
+            sub, sub_incremental = _diff_sections(old[line], children, path + (line,),
+                                                  added, removed)
+            incremental = incremental and sub_incremental
+            if sub:
+                commands.append(f'{indent}{line}')
+                commands.extend(sub)
+                commands.append(f'{indent}exit')
+
+    return commands, incremental
+
+
+def diff_configuration(old, new):
+    '''Compute the vtysh commands that turn one configuration into another
+    old:  (list or str) current configuration, e.g. as loaded from FRR
+    new:  (list or str) configuration to apply
+
+    return:  (commands, incremental, added, removed) - list of configuration
+             lines for "vtysh -f", whether they can safely be applied instead
+             of a full frr-reload and the paths of added and removed lines;
+             an empty command list means nothing changed
+    '''
+    if isinstance(old, str):
+        old = old.split('\n')
+    if isinstance(new, str):
+        new = new.split('\n')
+    added = []
+    removed = []
+    commands, incremental = _diff_sections(_parse_sections(old),
+                                           _parse_sections(new), (),
+                                           added, removed)
+    return commands, incremental, added, removed
+
+
+def apply_incremental(old, new, daemon=None):
+    '''Apply the difference between old and new configuration in a single
+    vtysh session, instead of a full frr-reload. Both must be rendered the
+    same way (i.e. by our templates) - lines are compared verbatim.
+
+    daemon:  Apply the commands to the specified FRR daemon only,
+             supplying daemon=None applies them to all daemons
+
+    return:  True if the changes were applied, False if a full reload is
+             required. vtysh does not roll back: if it fails part way, the
+             commands before the failing one remain applied and the caller
+             has to reload the full configuration
+    '''
+    if daemon and daemon not in _frr_daemons:
+        raise ValueError(f'The specified daemon type is not supported {repr(daemon)}')
+
+    commands, incremental, _, _ = diff_configuration(old, new)
+    if not commands:
+        LOG.debug('apply_incremental: configuration unchanged')
+        return True
+    if not incremental:
+        LOG.debug('apply_incremental: changes require a full reload')
+        return False
+
+    for i, e in enumerate(commands):
+        LOG.debug(f'apply_incremental: command {i:3} {e}')
+
+    with tempfile.NamedTemporaryFile('w') as f:
+        f.write('\n'.join(commands) + '\n')
+        f.flush()
+        cmd = f'{path_vtysh}'
+        if daemon:
+            cmd += f' -d {daemon}'
+        cmd += f' -f {f.name}'
+        output, code = popen(cmd, stderr=STDOUT)
+
+    if code:
+        LOG.debug(f'apply_incremental: vtysh failed ({code}): {output}')
+        return False
+
+    return True
+
+
+def _get_applied_state(key):
+    try:
+        with open(path_applied_state) as f:
+            return json.load(f).get(key)
+    except (OSError, ValueError):
+        return None
+
+
+def _set_applied_state(key, state):
+    try:
+        with open(path_applied_state) as f:
+            states = json.load(f)
+    except (OSError, ValueError):
+        states = {}
+    if state is None:
+        states.pop(key, None)
+    else:
+        states[key] = state
+    try:
+        with open(path_applied_state, 'w') as f:
+            json.dump(states, f)
+    except OSError as e:
+        LOG.debug(f'could not save incremental apply state: {e}')
+
+
 class FRRConfig:
     '''Main FRR Configuration manipulation object
     Using this object the user could load, manipulate and commit the configuration to FRR
     '''
     def __init__(self, config=[]):
         self.imported_config = ''
+        self._reset_changes()
 
         if isinstance(config, list):
             self.config = config.copy()
@@ -442,11 +632,51 @@ def load_configuration(self, daemon=None):
 
         self.original_config = self.imported_config.split('\n')
         self.config = self.original_config.copy()
+        self._reset_changes()
 
         for i, e in enumerate(self.imported_config.split('\n')):
             LOG.debug(f'load_configuration:  loaded    {i:3} {e}')
         return
 
+    def _reset_changes(self):
+        # modify_section() calls, lines they removed, lines added by us
+        self._modifications = []
+        self._removed = []
+        self._added = []
+
+    def _applied_state_key(self, daemon):
+        # the sections removed identify the owner of the added config
+        patterns = [m[0] for m in self._modifications]
+        return '\n'.join([daemon or 'frr'] + patterns)
+
+    def _rendered_sections(self, config):
+        '''Return the lines our modify_section() calls remove from config'''
+        tmp = FRRConfig(config)
+        for args in self._modifications:
+            tmp.modify_section(*args)
+        return tmp._removed
+
+    def _apply_incremental(self, daemon):
+        '''Apply the difference between the config we applied last time and
+        the config added now. This is only done if FRR still renders the
+        sections we own exactly as right after the last commit, otherwise
+        FRR's own rendering can not be compared with our templates.'''
+        state = _get_applied_state(self._applied_state_key(daemon))
+        if not state or state['rendered'] != self._removed:
+            LOG.debug('apply_incremental: no matching previous commit')
+            return False
+        return apply_incremental(state['applied'], self._added, daemon=daemon)
+
+    def _save_applied_state(self, daemon):
+        key = self._applied_state_key(daemon)
+        try:
+            running = get_configuration(daemon=daemon).split('\n')
+        except OSError:
+            _set_applied_state(key, None)
+            return
+        _set_applied_state(key, {'applied': self._added,
+                                 'rendered': self._rendered_sections(running)})
+
     def test_configuration(self):
         '''Test the current configuration against FRR
         This will exception if FRR failes to load the current configuration object
@@ -454,17 +684,37 @@ def test_configuration(self):
         LOG.debug('test_configation: Testing configuration')
         mark_configuration('\n'.join(self.config))
 
-    def commit_configuration(self, daemon=None):
+    def commit_configuration(self, daemon=None, incremental=True):
         '''
         Commit the current configuration to FRR daemon: str with name of the
         FRR daemon to commit to or None to use the consolidated config.
 
+        With incremental=True only the difference to the configuration added
+        by the previous commit of the same sections is applied in a single
+        vtysh session, provided FRR still runs that configuration unchanged;
+        frr-reload is used otherwise.
+
         Configuration is automatically saved after apply
         '''
         LOG.debug('commit_configuration:  Commiting configuration')
         for i, e in enumerate(self.config):
             LOG.debug(f'commit_configuration: new_config {i:3} {e}')
 
+        incremental = incremental and bool(self.imported_config)
+        if incremental:
+            key = self._applied_state_key(daemon)
+            try:
+                applied = self._apply_incremental(daemon)
+            except OSError as e:
+                LOG.debug(f'commit_configuration: incremental apply failed: {e}')
+                applied = False
+            # the state is only valid again once the commit succeeded
+            _set_applied_state(key, None)
+            if applied:
+                save_configuration()
+                self._save_applied_state(daemon)
+                return
+
         # https://github.com/FRRouting/frr/issues/10132
         # https://github.com/FRRouting/frr/issues/10133
         count = 0
@@ -488,6 +738,8 @@ def commit_configuration(self, daemon=None):
 
         # Save configuration to /run/frr/config/frr.conf
         save_configuration()
+        if incremental:
+            self._save_applied_state(daemon)
 
 
     def modify_section(self, start_pattern, replacement='!', stop_pattern=r'\S+', remove_stop_mark=False, count=0):
@@ -496,6 +748,8 @@ def modify_section(self, start_pattern, replacement='!', stop_pattern=r'\S+', re
         elif not isinstance(replacement, list):
             return ValueError("The replacement element needs to be a string or list type object")
         LOG.debug(f'modify_section: starting search for {repr(start_pattern)} until {repr(stop_pattern)}')
+        self._modifications.append((start_pattern, replacement, stop_pattern,
+                                    remove_stop_mark, count))
 
         _count = 0
         _next_start = 0
@@ -517,9 +771,11 @@ def modify_section(self, start_pattern, replacement='!', stop_pattern=r'\S+', re
             for i, e in enumerate(self.config[start_element:end_element+1 if remove_stop_mark else end_element],
                                   start=start_element):
                 LOG.debug(f'modify_section:   remove       {i:3} {e}')
+                self._removed.append(e)
             del self.config[start_element:end_element +
                             1 if remove_stop_mark else end_element]
             if replacement:
+                self._added.extend(replacement)
                 # Append the replacement config at the current position
                 for i, e in enumerate(replacement, start=start_element):
                     LOG.debug(f'modify_section:   add          {i:3} {e}')
@@ -542,6 +798,7 @@ def add_before(self, before_pattern, addition):
         for i, e in enumerate(addition, start=start):
             LOG.debug(f'add_before:   add          {i:3} {e}')
         self.config[start:start] = addition
+        self._added.extend(addition)
         return True
 
     def __str__(self):
@@ -16,8 +16,26 @@ def __init__(self):
             self.__socket.connect(SOCKET_PATH)
         except zmq.error.Again:
             raise VyOSHostsdError("Could not connect to vyos-hostsd")
+        self.__batch = None
+
+    def start_batch(self):
+        """ Queue all following messages until send_batch() is called """
+        self.__batch = []
+
+    def send_batch(self):
+        """ Send queued messages in a single round-trip, returns the list of
+        individual results """
+        msgs = self.__batch
+        self.__batch = None
+        if not msgs:
+            return []
+        return self._communicate({'op': 'batch', 'data': msgs})
 
     def _communicate(self, msg):
+        if self.__batch is not None:
+            self.__batch.append(msg)
+            return None
+
         try:
             request = json.dumps(msg).encode()
             self.__socket.send(request)
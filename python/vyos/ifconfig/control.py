@@ -21,6 +21,7 @@
 from vyos.ifconfig.section import Section
 from vyos.utils.process import popen
 from vyos.utils.process import cmd
+from vyos.utils.process import invalidate_command_cache
 from vyos.utils.file import read_file
 from vyos.utils.file import write_file
 from vyos import debug
@@ -140,6 +141,7 @@ def _write_sysfs(self, filename, value):
         """
         if os.path.isfile(filename):
             write_file(filename, str(value))
+            invalidate_command_cache()
             self._debug_msg("write '{}' > '{}'".format(value, filename))
             return True
         return False
@@ -22,6 +22,42 @@
 
 from vyos.ifconfig import Control
 
+# Interface counters and operational state of all interfaces, read with a
+# single netlink dump and shared by all Operational instances of a process.
+# Callers working on many interfaces take the snapshot up front, single
+# interface lookups only use it while it is fresh.
+_link_snapshot = {'timestamp': 0, 'links': {}}
+
+def get_link_snapshot(max_age=2, refresh=True):
+    """
+    Return a dict mapping interface names to their operational state and
+    statistics counters (named as in /sys/class/net/<ifname>/statistics).
+    The snapshot is refreshed by a RTM_GETLINK dump if older than max_age
+    seconds; with refresh=False an empty dict is returned instead.
+    """
+    now = time()
+    if now - _link_snapshot['timestamp'] <= max_age:
+        return _link_snapshot['links']
+    if not refresh:
+        return {}
+
+    from pyroute2 import IPRoute
+
+    links = {}
+    with IPRoute() as ipr:
+        for link in ipr.get_links():
+            ifname = link.get_attr('IFLA_IFNAME')
+            counters = link.get_attr('IFLA_STATS64') or link.get_attr('IFLA_STATS')
+            oper_state = link.get_attr('IFLA_OPERSTATE') or 'unknown'
+            links[ifname] = {
+                'oper_state': oper_state.lower(),
+                'stats': dict(counters) if counters else {},
+            }
+
+    _link_snapshot['timestamp'] = now
+    _link_snapshot['links'] = links
+    return links
+
 class Operational(Control):
     """
     A class able to load Interface statistics
@@ -93,6 +129,9 @@ def get_state(self):
         """
         # https://www.kernel.org/doc/Documentation/ABI/testing/sysfs-class-net
         # "unknown", "notpresent", "down", "lowerlayerdown", "testing", "dormant", "up"
+        link = get_link_snapshot(refresh=False).get(self.ifname)
+        if link:
+            return link['oper_state']
         return self.get_interface('oper_state')
 
     @classmethod
@@ -144,7 +183,8 @@ def load_counters(self):
             return no_stats
 
     def clear_counters(self):
-        stats = self.get_stats()
+        # counters to clear must not be taken from an older snapshot
+        stats = self.get_stats(use_snapshot=False)
         for counter, value in stats.items():
             stats[counter] = value
         self.save_counters(stats)
@@ -155,8 +195,14 @@ def reset_counters(self):
         except FileNotFoundError:
             pass
 
-    def get_stats(self):
+    def get_stats(self, use_snapshot=True):
         """ return a dict() with the value for each interface counter """
+        link = None
+        if use_snapshot:
+            link = get_link_snapshot(refresh=False).get(self.ifname)
+        if link and all(counter in link['stats'] for counter in self._stats_all):
+            return {counter: int(link['stats'][counter]) for counter in self._stats_all}
+
         stats = {}
         for counter in self._stats_all:
             stats[counter] = int(self.get_interface(counter))
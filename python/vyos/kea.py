@@ -15,8 +15,11 @@
 
 import json
 import os
+import select
 import socket
 
+from threading import Lock
+
 from vyos.template import is_ipv6
 from vyos.template import isc_static_route
 from vyos.template import netmask_from_cidr
@@ -295,40 +298,157 @@ def kea6_parse_subnet(subnet, config):
 
     return out
 
-def _ctrl_socket_command(inet, command, args=None):
-    path = kea_ctrl_socket.format(inet=inet)
-
-    if not os.path.exists(path):
-        return None
-
-    if file_permissions(path) != '0775':
-        run(f'sudo chmod 775 {path}')
-
-    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
-        sock.connect(path)
+class KeaCtrlClient:
+    """ Client for the Kea control socket
+
+    Kea closes the control connection after every response, so a new
+    connection is used per command. Responses are received into a buffer
+    kept across commands, growing geometrically for large lease dumps,
+    until EOF or until a complete JSON document has arrived.
+    """
+    recv_size = 65536
+
+    def __init__(self, inet):
+        self.path = kea_ctrl_socket.format(inet=inet)
+        self._buffer = bytearray(self.recv_size)
+        # the buffer is shared by all threads using this client
+        self._lock = Lock()
+
+    def _connect(self):
+        if file_permissions(self.path) != '0775':
+            run(f'sudo chmod 775 {self.path}')
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _receive(self, sock):
+        """ Read one response """
+        length = 0
+        while True:
+            if length == len(self._buffer):
+                # grow the buffer geometrically, keeps large lease dumps linear
+                self._buffer.extend(bytes(len(self._buffer)))
+            received = sock.recv_into(memoryview(self._buffer)[length:])
+            if not received:
+                break
+            length += received
+            # Only try to decode once the response ends in a closing brace
+            # and the server has nothing more queued for us
+            if self._buffer[length - 1] == ord('}') and \
+                    not select.select([sock], [], [], 0)[0]:
+                try:
+                    return json.loads(self._buffer[:length])
+                except ValueError:
+                    continue
+
+        if not length:
+            return None
+        return json.loads(self._buffer[:length])
+
+    def command(self, command, args=None):
+        if not os.path.exists(self.path):
+            return None
 
         payload = {'command': command}
         if args:
             payload['arguments'] = args
+        request = json.dumps(payload).encode('utf-8')
+
+        with self._lock:
+            try:
+                sock = self._connect()
+            except OSError:
+                return None
+            try:
+                sock.sendall(request)
+                return self._receive(sock)
+            except OSError:
+                return None
+            finally:
+                sock.close()
+
+_ctrl_clients = {}
+_ctrl_clients_lock = Lock()
 
-        sock.send(bytes(json.dumps(payload), 'utf-8'))
-        result = b''
-        while True:
-            data = sock.recv(4096)
-            result += data
-            if len(data) < 4096:
-                break
-
-        return json.loads(result.decode('utf-8'))
-
-def kea_get_leases(inet):
-    leases = _ctrl_socket_command(inet, f'lease{inet}-get-all')
+def _ctrl_socket_command(inet, command, args=None):
+    with _ctrl_clients_lock:
+        if inet not in _ctrl_clients:
+            _ctrl_clients[inet] = KeaCtrlClient(inet)
+        client = _ctrl_clients[inet]
+    return client.command(command, args)
+
+# Number of leases requested per lease4-get-page/lease6-get-page command
+kea_lease_page_size = 1000
+
+def kea_iter_leases(inet, subnets=None, page_size=None):
+    """ Yield leases page by page - only one page of leases is transferred
+    and decoded at a time. Falls back to a full lease dump if paging is not
+    supported by the lease backend. The page commands can not filter by
+    subnet, leases of given subnets are requested with a single filtered
+    dump instead. """
+    if subnets:
+        yield from kea_get_all_leases(inet, subnets)
+        return
+
+    if page_size is None:
+        page_size = kea_lease_page_size
+
+    start = 'start'
+    while True:
+        args = {'from': start, 'limit': page_size}
+        result = _ctrl_socket_command(inet, f'lease{inet}-get-page', args)
+
+        if not result or 'result' not in result:
+            return
+        if result['result'] == 2:
+            # command unsupported
+            yield from kea_get_all_leases(inet)
+            return
+        if result['result'] != 0:
+            # 3: no (more) leases
+            return
+
+        leases = result['arguments']['leases']
+        yield from leases
+
+        if len(leases) < page_size:
+            return
+        start = leases[-1]['ip-address']
+
+def kea_get_all_leases(inet, subnets=None):
+    args = None
+    if subnets:
+        # Let Kea filter on subnet instead of transferring every lease
+        args = {'subnets': [int(subnet_id) for subnet_id in subnets]}
+
+    leases = _ctrl_socket_command(inet, f'lease{inet}-get-all', args)
 
     if not leases or 'result' not in leases or leases['result'] != 0:
         return []
 
     return leases['arguments']['leases']
 
+def kea_get_leases(inet, subnets=None):
+    return list(kea_iter_leases(inet, subnets=subnets))
+
+def kea_get_lease(inet, ip_address):
+    """ Lookup a single lease by address instead of dumping all leases """
+    lease_types = ['IA_NA', 'IA_PD'] if inet == '6' else [None]
+    for lease_type in lease_types:
+        args = {'ip-address': ip_address}
+        if lease_type:
+            args['type'] = lease_type
+
+        result = _ctrl_socket_command(inet, f'lease{inet}-get', args)
+        if result and result.get('result') == 0:
+            return result['arguments']
+
+    return None
+
 def kea_delete_lease(inet, ip_address):
     args = {'ip-address': ip_address}
 
@@ -347,18 +467,20 @@ def kea_get_active_config(inet):
 
     return config
 
-def kea_get_pool_from_subnet_id(config, inet, subnet_id):
+def kea_get_pool_map(config, inet):
+    """ Return a mapping of subnet ID to shared-network (pool) name """
     shared_networks = dict_search_args(config, 'arguments', f'Dhcp{inet}', 'shared-networks')
 
+    out = {}
     if not shared_networks:
-        return None
+        return out
 
     for network in shared_networks:
         if f'subnet{inet}' not in network:
             continue
 
         for subnet in network[f'subnet{inet}']:
-            if 'id' in subnet and int(subnet['id']) == int(subnet_id):
-                return network['name']
+            if 'id' in subnet:
+                out.setdefault(int(subnet['id']), network['name'])
 
-    return None
+    return out
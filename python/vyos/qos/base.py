@@ -14,6 +14,7 @@
 # License along with this library.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import json
 import jmespath
 
 from vyos.base import Warning
@@ -25,8 +26,35 @@
 from vyos.utils.network import get_protocol_by_name
 
 
+def tc_batch(commands: list):
+    """
+    Run a list of tc commands through a single 'tc -batch' invocation.
+    The leading 'tc' of every command is optional. Raises OSError on the
+    first failing command, same as running them one by one would.
+    """
+    lines = [c[3:] if c.startswith('tc ') else c for c in commands]
+    if not lines:
+        return
+    cmd('tc -batch -', input='\n'.join(lines) + '\n')
+
+
+def get_tc_qdiscs() -> dict:
+    """
+    Return the qdiscs currently installed in the kernel, per interface as a
+    sorted list of (kind, handle, parent) tuples. The parent of a root qdisc
+    is reported as 'root'.
+    """
+    qdiscs = {}
+    for qdisc in json.loads(cmd('tc -json qdisc show') or '[]'):
+        parent = 'root' if qdisc.get('root') else qdisc.get('parent', '')
+        qdiscs.setdefault(qdisc['dev'], []).append(
+            (qdisc['kind'], qdisc['handle'], parent))
+    return {ifname: sorted(entries) for ifname, entries in qdiscs.items()}
+
+
 class QoSBase:
     _debug = False
+    _commands = None
     _direction = ['egress']
     _parent = 0xffff
     _dsfields = {
@@ -73,8 +101,23 @@ def __init__(self, interface):
     def _cmd(self, command):
         if self._debug:
             print(f'DEBUG/QoS: {command}')
+        if self._commands is not None:
+            self._commands.append(command)
+            return ''
         return cmd(command)
 
+    def get_commands(self, config, direction) -> list:
+        """
+        Return the tc commands update() would run for the given config,
+        without running them. They can be applied later using tc_batch().
+        """
+        self._commands = []
+        try:
+            self.update(config, direction)
+            return self._commands
+        finally:
+            self._commands = None
+
     def get_direction(self) -> list:
         return self._direction
 
@@ -1,4 +1,4 @@
-# Copyright 2023 VyOS maintainers and contributors <maintainers@vyos.io>
+# Copyright 2023-2024 VyOS maintainers and contributors <maintainers@vyos.io>
 #
 # This library is free software; you can redistribute it and/or
 # modify it under the terms of the GNU Lesser General Public
@@ -13,27 +13,37 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library.  If not, see <http://www.gnu.org/licenses/>.
 
-def commit_in_progress():
-    """ Not to be used in normal op mode scripts! """
+def _lock_in_proc_locks(path):
+    """ Check /proc/locks for an advisory lock (flock or POSIX) on path
 
-    # The CStore backend locks the config by opening a file
-    # The file is not removed after commit, so just checking
-    # if it exists is insufficient, we need to know if it's open by anyone
+    Returns True or False, or None if /proc/locks is not available
+    """
+    import os
 
-    # There are two ways to check if any other process keeps a file open.
-    # The first one is to try opening it and see if the OS objects.
-    # That's faster but prone to race conditions and can be intrusive.
-    # The other one is to actually check if any process keeps it open.
-    # It's non-intrusive but needs root permissions, else you can't check
-    # processes of other users.
-    #
-    # Since this will be used in scripts that modify the config outside of the CLI
-    # framework, those knowingly have root permissions.
-    # For everything else, we add a safeguard.
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+
+    # /proc/locks identifies the file as <major>:<minor>:<inode>
+    token = f' {os.major(st.st_dev):02x}:{os.minor(st.st_dev):02x}:{st.st_ino} '
+    try:
+        with open('/proc/locks') as f:
+            for line in f:
+                if token in line:
+                    return True
+    except OSError:
+        return None
+
+    return False
+
+def _lock_in_open_files(path):
+    # Check every process for an open file handle on path. This is costly
+    # on systems with many processes and needs root permissions, else you
+    # can't check processes of other users.
     from psutil import process_iter
     from psutil import NoSuchProcess
     from getpass import getuser
-    from vyos.defaults import commit_lock
 
     if getuser() != 'root':
         raise OSError('This functions needs to be run as root to return correct results!')
@@ -43,7 +53,7 @@ def commit_in_progress():
             files = proc.open_files()
             if files:
                 for f in files:
-                    if f.path == commit_lock:
+                    if f.path == path:
                         return True
         except NoSuchProcess as err:
             # Process died before we could examine it
@@ -51,10 +61,41 @@ def commit_in_progress():
     # Default case
     return False
 
-
-def wait_for_commit_lock():
+def commit_in_progress():
     """ Not to be used in normal op mode scripts! """
-    from time import sleep
-    # Very synchronous approach to multiprocessing
+
+    # The CStore backend locks the config by taking an advisory lock on
+    # a file. The file is not removed after commit, so just checking if
+    # it exists is insufficient, we need to know if it's locked by anyone.
+    #
+    # Trying to take the lock ourselves would be intrusive and prone to
+    # race conditions, so instead look it up in the kernel lock table:
+    # this is a single read of /proc/locks, independent of the number of
+    # processes on the system. Only if that is not available, fall back
+    # to scanning the open files of all processes.
+    from vyos.defaults import commit_lock
+
+    res = _lock_in_proc_locks(commit_lock)
+    if res is None:
+        res = _lock_in_open_files(commit_lock)
+    return res
+
+def wait_for_commit_lock(timeout=None):
+    """ Not to be used in normal op mode scripts!
+
+    Block until no commit is in progress. Instead of polling, wait for the
+    commit process to close the lock file; the state is re-checked at
+    least once per second, should the release be missed.
+    """
+    from time import time
+    from vyos.defaults import commit_lock
+    from vyos.utils.file import wait_for_file_write_complete
+
+    time_start = time()
     while commit_in_progress():
-        sleep(1)
+        if timeout is not None and (time() - time_start) > timeout:
+            raise TimeoutError('Commit still in progress')
+        try:
+            wait_for_file_write_complete(commit_lock, timeout=1)
+        except OSError:
+            pass
@@ -50,7 +50,7 @@ def is_netns_interface(interface, netns):
 def get_netns_all() -> list:
     from json import loads
     from vyos.utils.process import cmd
-    tmp = loads(cmd('ip --json netns ls'))
+    tmp = loads(cmd('ip --json netns ls', cache=True))
     return [ netns['name'] for netns in tmp ]
 
 def get_vrf_members(vrf: str) -> list:
@@ -65,7 +65,7 @@ def get_vrf_members(vrf: str) -> list:
     try:
         if not interface_exists(vrf):
             raise ValueError(f'VRF "{vrf}" does not exist!')
-        output = cmd(f'ip --json --brief link show vrf {vrf}')
+        output = cmd(f'ip --json --brief link show vrf {vrf}', cache=True)
         answer = json.loads(output)
         for data in answer:
             if 'ifname' in data:
@@ -126,13 +126,13 @@ def get_interface_namespace(interface: str):
     from vyos.utils.process import cmd
 
     # Bail out early if netns does not exist
-    tmp = cmd(f'ip --json netns ls')
+    tmp = cmd(f'ip --json netns ls', cache=True)
     if not tmp: return None
 
     for ns in loads(tmp):
         netns = f'{ns["name"]}'
         # Search interface in each netns
-        data = loads(cmd(f'ip netns exec {netns} ip --json link show'))
+        data = loads(cmd(f'ip netns exec {netns} ip --json link show', cache=True))
         for tmp in data:
             if interface == tmp["ifname"]:
                 return netns
@@ -205,7 +205,7 @@ def get_all_vrfs():
     """ Return a dictionary of all system wide known VRF instances """
     from json import loads
     from vyos.utils.process import cmd
-    tmp = loads(cmd('ip --json vrf list'))
+    tmp = loads(cmd('ip --json vrf list', cache=True))
     # Result is of type [{"name":"red","table":1000},{"name":"blue","table":2000}]
     # so we will re-arrange it to a more nicer representation:
     # {'red': {'table': 1000}, 'blue': {'table': 2000}}
@@ -14,14 +14,88 @@
 # License along with this library.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import re
 
+from contextlib import contextmanager
 from subprocess import Popen
 from subprocess import PIPE
 from subprocess import STDOUT
 from subprocess import DEVNULL
+from time import monotonic
+
+# Output of idempotent read-only commands run with cache=True, keyed by the
+# command and its execution parameters. Caching is only active between
+# start_command_cache() and stop_command_cache() (vyos-configd does so per
+# commit) or within a command_cache_scope(); anywhere else a commit done by
+# another process could leave the output stale at any time.
+# The cache is dropped as soon as any command not known to be read-only is
+# run.
+command_cache = {}
+_command_cache_active = False
+
+# Wall time of commands spawned while enabled by enable_command_stats():
+# {command: [count, seconds]}
+command_stats = {}
+_command_stats_active = False
+
+# Commands known not to change any system state, running them does not
+# invalidate the command cache
+read_only_commands = re.compile(r'''^(sudo\s+)?(
+    ip\s+(-\S+\s+)*(link|addr|address|route|rule|neigh|neighbor|netns|vrf|tun|tunnel)
+        (\s+(show|list|ls)\b.*)?$ |
+    ip\s+netns\s+exec\s+\S+\s+ip\s+(-\S+\s+)*\S+\s+(show|list|ls)\b.* |
+    nft\s+(-\S+\s+)*list\s.* |
+    ethtool\s+((--json|--driver|--show-\S+|-[ikga])\s+)*\S+$ |
+    sysctl\s+-n\S*\s+\S+$ |
+    systemctl\s+(show|is-active|is-enabled|status)\s.* |
+    (bridge|tc)\s+(-\S+\s+)*\S+\s+show\b.*
+)''', re.VERBOSE)
+
+def invalidate_command_cache():
+    """ Drop all cached command output, must be called after changing system
+    state by other means than running a command (e.g. writing to sysfs) """
+    command_cache.clear()
+
+def start_command_cache():
+    """ Start caching the output of commands run with cache=True """
+    global _command_cache_active
+    command_cache.clear()
+    _command_cache_active = True
+
+def stop_command_cache():
+    """ Stop caching command output and drop the cached output """
+    global _command_cache_active
+    _command_cache_active = False
+    command_cache.clear()
+
+@contextmanager
+def command_cache_scope():
+    """ Cache the output of commands run with cache=True within the block """
+    start_command_cache()
+    try:
+        yield
+    finally:
+        stop_command_cache()
+
+def enable_command_stats(enable=True):
+    """ Start or stop recording the wall time of spawned commands """
+    global _command_stats_active
+    _command_stats_active = enable
+
+def reset_command_stats():
+    command_stats.clear()
+
+def get_command_stats(top=None) -> list:
+    """
+    Return a list of (command, count, seconds) tuples sorted by the total
+    wall time spent, optionally limited to the top entries
+    """
+    stats = sorted(((command, count, seconds) for command, (count, seconds)
+                    in command_stats.items()), key=lambda x: x[2], reverse=True)
+    return stats[:top] if top else stats
 
 def popen(command, flag='', shell=None, input=None, timeout=None, env=None,
-          stdout=PIPE, stderr=PIPE, decode='utf-8'):
+          stdout=PIPE, stderr=PIPE, decode='utf-8', cache=False):
     """
     popen is a wrapper helper aound subprocess.Popen
     with it default setting it will return a tuple (out, err)
@@ -45,6 +119,9 @@ def popen(command, flag='', shell=None, input=None, timeout=None, env=None,
               - DEVNULL, discard the output
     decode:  specify the expected text encoding (utf-8, ascii, ...)
              the default is explicitely utf-8 which is python's own default
+    cache:   re-use the result of a previous identical run of the command,
+             only to be used for idempotent read-only commands; has no
+             effect unless command caching was started
 
     usage:
     get both stdout and stderr: popen('command', stdout=PIPE, stderr=STDOUT)
@@ -60,6 +137,17 @@ def popen(command, flag='', shell=None, input=None, timeout=None, env=None,
     if not debug.enabled(flag):
         flag = 'command'
 
+    cache_key = None
+    if cache and input is None and _command_cache_active:
+        cache_key = (str(command), shell, timeout, stdout, stderr, decode,
+                     tuple(sorted(env.items())) if env else None)
+        if cache_key in command_cache:
+            return command_cache[cache_key]
+    elif command_cache and not read_only_commands.match(str(command)):
+        # the command might change the system state the cached output
+        # was obtained from
+        command_cache.clear()
+
     cmd_msg = f"cmd '{command}'"
     debug.message(cmd_msg, flag)
 
@@ -76,11 +164,20 @@ def popen(command, flag='', shell=None, input=None, timeout=None, env=None,
         stdin = PIPE
         input = input.encode() if type(input) is str else input
 
+    start = monotonic()
     p = Popen(command, stdin=stdin, stdout=stdout, stderr=stderr,
               env=env, shell=use_shell)
 
     pipe = p.communicate(input, timeout)
 
+    elapsed = monotonic() - start
+    if _command_stats_active:
+        stats = command_stats.setdefault(str(command), [0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed
+    if debug.enabled('timing'):
+        debug.message(f"cmd '{command}' took {elapsed:.3f}s", 'timing')
+
     pipe_out = b''
     if stdout == PIPE:
         pipe_out = pipe[0]
@@ -107,6 +204,9 @@ def popen(command, flag='', shell=None, input=None, timeout=None, env=None,
         airbag.noteworthy(out_msg)
         airbag.noteworthy(err_msg)
 
+    if cache_key is not None:
+        command_cache[cache_key] = (str_out, p.returncode)
+
     return str_out, p.returncode
 
 
@@ -128,7 +228,7 @@ def run(command, flag='', shell=None, input=None, timeout=None, env=None,
 
 def cmd(command, flag='', shell=None, input=None, timeout=None, env=None,
         stdout=PIPE, stderr=PIPE, decode='utf-8', raising=None, message='',
-        expect=[0]):
+        expect=[0], cache=False):
     """
     A wrapper around popen, which returns the stdout and
     will raise the error code of a command
@@ -137,13 +237,14 @@ def cmd(command, flag='', shell=None, input=None, timeout=None, env=None,
              the class should only require a string as parameter
              (default is OSError) with the error code
     expect:  a list of error codes to consider as normal
+    cache:   re-use the output of a previous run of this read-only command
     """
     decoded, code = popen(
         command, flag,
         stdout=stdout, stderr=stderr,
         input=input, timeout=timeout,
         env=env, shell=shell,
-        decode=decode,
+        decode=decode, cache=cache,
     )
     if code not in expect:
         feedback = message + '\n' if message else ''
@@ -159,7 +260,7 @@ def cmd(command, flag='', shell=None, input=None, timeout=None, env=None,
 
 
 def rc_cmd(command, flag='', shell=None, input=None, timeout=None, env=None,
-           stdout=PIPE, stderr=STDOUT, decode='utf-8'):
+           stdout=PIPE, stderr=STDOUT, decode='utf-8', cache=False):
     """
     A wrapper around popen, which returns the return code
     of a command and stdout
@@ -174,7 +275,7 @@ def rc_cmd(command, flag='', shell=None, input=None, timeout=None, env=None,
         stdout=stdout, stderr=stderr,
         input=input, timeout=timeout,
         env=env, shell=shell,
-        decode=decode,
+        decode=decode, cache=cache,
     )
     return code, out
 
@@ -13,6 +13,8 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this library.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+
 from typing import Optional, Union, TYPE_CHECKING
 from vyos.xml_ref import definition
 from vyos.xml_ref import op_definition
@@ -20,6 +22,8 @@
 if TYPE_CHECKING:
     from vyos.config import ConfigDict
 
+ref_cache_dir = os.path.join(os.path.dirname(__file__), 'ref_cache')
+
 def load_reference(cache=[]):
     if cache:
         return cache[0]
@@ -27,9 +31,13 @@ def load_reference(cache=[]):
     xml = definition.Xml()
 
     try:
-        from vyos.xml_ref.cache import reference
+        reference = definition.LazyReference(ref_cache_dir)
     except Exception:
-        raise ImportError('no xml reference cache !!')
+        # fall back to the monolithic cache module
+        try:
+            from vyos.xml_ref.cache import reference
+        except Exception:
+            raise ImportError('no xml reference cache !!')
 
     if not reference:
         raise ValueError('empty xml reference cache !!')
@@ -13,6 +13,10 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this library.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import pickle
+from collections import OrderedDict
+from collections.abc import Mapping
 from typing import Tuple, Optional, Union, Any, TYPE_CHECKING
 
 # https://peps.python.org/pep-0484/#forward-references
@@ -59,12 +63,85 @@ def from_source(d: dict, path: list) -> bool:
             return False
     return d.get('_source', False)
 
+ref_index_name = '_index.pickle'
+
+class LazyReference(Mapping):
+    """Reference tree stored as one pickle per top-level node
+
+    Only the index (top-level node names and component versions) is read on
+    instantiation; a top-level subtree is unpickled on first access, so the
+    cost of a lookup does not depend on the size of the whole CLI schema.
+    """
+    def __init__(self, path: str):
+        self._path = path
+        with open(os.path.join(path, ref_index_name), 'rb') as f:
+            index = pickle.load(f)
+        self._nodes = index['nodes']
+        self._names = frozenset(self._nodes)
+        self._loaded = {'component_version': index['component_version']}
+
+    def __getitem__(self, key):
+        if key in self._loaded:
+            return self._loaded[key]
+        if key not in self._names:
+            raise KeyError(key)
+        with open(os.path.join(self._path, f'{key}.pickle'), 'rb') as f:
+            node = pickle.load(f)
+        self._loaded[key] = node
+        return node
+
+    def __contains__(self, key):
+        return key in self._names or key == 'component_version'
+
+    def __iter__(self):
+        yield from self._nodes
+        yield 'component_version'
+
+    def __len__(self):
+        return len(self._nodes) + 1
+
+def write_lazy_reference(ref: dict, path: str):
+    """Split reference tree into the on-disk layout read by LazyReference"""
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith('.pickle'):
+            os.unlink(os.path.join(path, name))
+
+    nodes = [k for k in ref if k != 'component_version']
+    for k in nodes:
+        with open(os.path.join(path, f'{k}.pickle'), 'wb') as f:
+            pickle.dump(ref[k], f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # index is written last, a partially written cache is never picked up
+    index = {'nodes': nodes,
+             'component_version': ref.get('component_version', {})}
+    tmp = os.path.join(path, f'{ref_index_name}.tmp')
+    with open(tmp, 'wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, os.path.join(path, ref_index_name))
+
+def _copy_defaults(d: dict) -> dict:
+    res = {}
+    for k, v in d.items():
+        if isinstance(v, dict):
+            res[k] = _copy_defaults(v)
+        elif isinstance(v, list):
+            res[k] = v.copy()
+        else:
+            res[k] = v
+    return res
+
 class Xml:
+    # number of schema nodes for which computed defaults are retained
+    defaults_cache_size = 1024
+
     def __init__(self):
         self.ref = {}
+        self._defaults_cache = OrderedDict()
 
     def define(self, ref: dict):
         self.ref = ref
+        self._defaults_cache.clear()
 
     def _get_ref_node_data(self, node: dict, data: str) -> Union[bool, str]:
         res = node.get('node_data', {})
@@ -76,13 +153,14 @@ def _get_ref_node_data(self, node: dict, data: str) -> Union[bool, str]:
         return res.get(data)
 
     def _get_ref_path(self, path: list) -> dict:
-        ref_path = path.copy()
         d = self.ref
-        while ref_path and d:
-            d = d.get(ref_path[0], {})
-            ref_path.pop(0)
-            if self._is_tag_node(d) and ref_path:
-                ref_path.pop(0)
+        i, n = 0, len(path)
+        while i < n and d:
+            d = d.get(path[i], {})
+            i += 1
+            if self._is_tag_node(d) and i < n:
+                # skip tag node value
+                i += 1
 
         return d
 
@@ -117,15 +195,15 @@ def split_path(self, path: list) -> Tuple[list, Optional[str]]:
                 raise ValueError(f'Path "{path}" is incorrect')
 
     def is_tag(self, path: list) -> bool:
-        ref_path = path.copy()
         d = self.ref
-        while ref_path and d:
-            d = d.get(ref_path[0], {})
-            ref_path.pop(0)
-            if self._is_tag_node(d) and ref_path:
-                if len(ref_path) == 1:
+        i, n = 0, len(path)
+        while i < n and d:
+            d = d.get(path[i], {})
+            i += 1
+            if self._is_tag_node(d) and i < n:
+                if n - i == 1:
                     return False
-                ref_path.pop(0)
+                i += 1
 
         return self._is_tag_node(d)
 
@@ -162,19 +240,19 @@ def is_leaf(self, path: list) -> bool:
         return self._is_leaf_node(d)
 
     def _least_upper_data(self, path: list, name: str) -> str:
-        ref_path = path.copy()
         d = self.ref
         data = ''
         tag = ''
-        while ref_path and d:
+        i, n = 0, len(path)
+        while i < n and d:
             tag_val = ''
-            d = d.get(ref_path[0], {})
-            ref_path.pop(0)
-            if self._is_tag_node(d) and ref_path:
-                tag_val = ref_path[0]
-                ref_path.pop(0)
-            if self._is_leaf_node(d) and ref_path:
-                ref_path.pop(0)
+            d = d.get(path[i], {})
+            i += 1
+            if self._is_tag_node(d) and i < n:
+                tag_val = path[i]
+                i += 1
+            if self._is_leaf_node(d) and i < n:
+                i += 1
             res = self._get_ref_node_data(d, name)
             if res is not None:
                 data = res
@@ -272,9 +350,8 @@ def get_defaults(self, path: list, get_first_key=False, recursive=False) -> dict
         to an existing config dict containing tag node values, see function:
         'relative_defaults'
         """
-        res: dict = {}
         if self.is_tag(path):
-            return res
+            return {}
 
         d = self._get_ref_path(path)
 
@@ -283,27 +360,55 @@ def get_defaults(self, path: list, get_first_key=False, recursive=False) -> dict
             if default_value is not None:
                 return {path[-1]: default_value} if path else {}
 
-        for k in list(d):
+        res = _copy_defaults(self._node_defaults(d, recursive))
+        if res:
+            if get_first_key or not path:
+                return res
+            return {path[-1]: res}
+
+        return {}
+
+    def _node_defaults(self, node: dict, recursive: bool) -> dict:
+        """Defaults below a reference node; the result only depends on the
+        schema node, not on the tag node values of the path leading to it,
+        so it is computed once per node and retained in an LRU cache. The
+        returned dict is shared and must not be modified.
+
+        Entries hold a reference to the node: it can not be freed while
+        cached, so its id can not be re-used by another node; the identity
+        check covers temporary nodes such as the {} of a missing path.
+        """
+        key = (id(node), recursive)
+        cache = self._defaults_cache
+        entry = cache.get(key)
+        if entry is not None and entry[0] is node:
+            cache.move_to_end(key)
+            return entry[1]
+
+        res: dict = {}
+        for k in list(node):
             if k in ('node_data', 'component_version') :
                 continue
-            if self._is_leaf_node(d[k]):
-                default_value = self._get_default(d[k])
+            if self._is_leaf_node(node[k]):
+                default_value = self._get_default(node[k])
                 if default_value is not None:
-                    res |= {k: default_value}
-            elif self.is_tag(path + [k]):
+                    res[k] = default_value
+            elif self._is_tag_node(node[k]):
                 # tag node defaults are used as suggestion, not default value;
                 # should this change, append to path and continue if recursive
                 pass
             else:
                 if recursive:
-                    pos = self.get_defaults(path + [k], recursive=True)
-                    res |= pos
-        if res:
-            if get_first_key or not path:
-                return res
-            return {path[-1]: res}
+                    pos = self._node_defaults(node[k], recursive=True)
+                    if pos:
+                        res[k] = pos
 
-        return {}
+        cache[key] = (node, res)
+        cache.move_to_end(key)
+        if len(cache) > self.defaults_cache_size:
+            cache.popitem(last=False)
+
+        return res
 
     def _well_defined(self, path: list, conf: dict) -> bool:
         # test disjoint path + conf for sensible config paths
@@ -324,20 +429,38 @@ def step(c):
         return True
 
     def _relative_defaults(self, rpath: list, conf: dict, recursive=False) -> dict:
-        res: dict = {}
-        res = self.get_defaults(rpath, recursive=recursive,
-                                get_first_key=True)
-        for k in list(conf):
-            if isinstance(conf[k], dict):
-                step = self._relative_defaults(rpath + [k], conf=conf[k],
-                                               recursive=recursive)
-                res |= step
+        node = self._get_ref_path(rpath)
+        tag = self.is_tag(rpath)
+        res = self._relative_defaults_node(node, tag, conf, recursive)
 
         if res:
             return {rpath[-1]: res} if rpath else res
 
         return {}
 
+    def _relative_defaults_node(self, node: dict, tag: bool, conf: dict,
+                                recursive: bool) -> dict:
+        # descend reference and config dict in parallel, so that each
+        # config node is resolved in constant time instead of per path
+        res: dict = {}
+        if not tag and not self._is_leaf_node(node):
+            res = _copy_defaults(self._node_defaults(node, recursive))
+
+        for k in list(conf):
+            if isinstance(conf[k], dict):
+                if tag:
+                    # k is a tag node value, stay on the same reference node
+                    child, child_tag = node, False
+                else:
+                    child = node.get(k, {})
+                    child_tag = self._is_tag_node(child)
+                step = self._relative_defaults_node(child, child_tag, conf[k],
+                                                    recursive)
+                if step:
+                    res[k] = step
+
+        return res
+
     def relative_defaults(self, path: list, conf: dict, get_first_key=False,
                           recursive=False) -> dict:
         """Return dict containing defaults along paths of a config dict
@@ -19,6 +19,8 @@
 from copy import deepcopy
 from generate_cache import pkg_cache
 from generate_cache import ref_cache
+from generate_cache import ref_cache_dir
+from definition import write_lazy_reference
 
 def dict_merge(source, destination):
     dest = deepcopy(destination)
@@ -47,5 +49,7 @@ def main():
     with open(ref_cache, 'w') as f:
         f.write(f'reference = {str(res)}')
 
+    write_lazy_reference(res, ref_cache_dir)
+
 if __name__ == '__main__':
     main()
@@ -29,6 +29,7 @@
 from vyos.utils.process import process_named_running
 from vyos.xml_ref import default_value
 
+from vyos.configquery import ConfigTreeQuery
 from vyos.configsession import ConfigSessionError
 
 base_path = ['service', 'https']
@@ -352,6 +353,12 @@ def test_api_add_delete(self):
         # api configured; expect 200
         self.assertEqual(r.status_code, 200)
 
+        # unchanged config is not transferred again
+        etag = r.headers['ETag']
+        r = request('POST', url, verify=False, data=payload,
+                    headers={'If-None-Match': etag})
+        self.assertEqual(r.status_code, 304)
+
         self.cli_delete(base_path + ['api'])
         self.cli_commit()
 
@@ -421,6 +428,33 @@ def test_api_configure(self):
         r = request('POST', url, verify=False, headers=headers, data=payload)
         self.assertEqual(r.status_code, 200)
 
+    @ignore_warning(InsecureRequestWarning)
+    def test_api_configure_bulk(self):
+        address = '127.0.0.1'
+        key = 'VyOS-key'
+        url = f'https://{address}/configure-bulk'
+        headers = {}
+        conf_interface = 'dum0'
+        conf_addresses = ['192.0.2.44/32', '192.0.2.45/32']
+
+        self.cli_set(base_path + ['api', 'keys', 'id', 'key-01', 'key', key])
+        self.cli_set(base_path + ['api', 'rest'])
+        self.cli_commit()
+
+        commands = [{'op': 'set', 'path': ['interfaces', 'dummy', conf_interface,
+                                           'address', conf_address]}
+                    for conf_address in conf_addresses]
+        payload = {'data': json.dumps(commands), 'key': key}
+
+        r = request('POST', url, verify=False, headers=headers, data=payload)
+        self.assertEqual(r.status_code, 200)
+        self.assertIn('timing', r.json()['data'])
+
+        tmp = ConfigTreeQuery().values(['interfaces', 'dummy', conf_interface, 'address'])
+        self.assertEqual(sorted(tmp), conf_addresses)
+
+        self.cli_delete(['interfaces', 'dummy', conf_interface])
+
     @ignore_warning(InsecureRequestWarning)
     def test_api_config_file(self):
         address = '127.0.0.1'
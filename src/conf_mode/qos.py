@@ -14,6 +14,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import json
+
 from sys import exit
 from netifaces import interfaces
 
@@ -36,7 +39,11 @@
 from vyos.qos import RoundRobin
 from vyos.qos import TrafficShaper
 from vyos.qos import TrafficShaperHFSC
+from vyos.qos import get_tc_qdiscs
+from vyos.qos import tc_batch
 from vyos.utils.dict import dict_search_recursive
+from vyos.utils.file import read_file
+from vyos.utils.file import write_file
 from vyos.utils.process import run
 from vyos import ConfigError
 from vyos import airbag
@@ -45,6 +52,9 @@
 
 airbag.enable()
 
+# tc commands and resulting kernel qdiscs per interface of the last commit
+qos_state_file = '/run/qos/state.json'
+
 map_vyops_tc = {
     'cake'             : CAKE,
     'drop_tail'        : DropTail,
@@ -143,6 +153,8 @@ def get_config(config=None):
         if conf.exists(f'{path} mirror') or conf.exists(f'{path} redirect'):
             type_node = path.split(" ")[1] # return only interface type node
             set_dependents(type_node, conf, ifname.split(".")[0])
+            # mirror/redirect re-adds its own qdiscs - always rebuild QoS
+            qos.setdefault('mirror_redirect', []).append(ifname)
 
     for policy in qos.get('policy', []):
         if policy in ['random_detect']:
@@ -342,33 +354,79 @@ def generate(qos):
     return None
 
 
-def apply(qos):
-    # Always delete "old" shapers first
-    for interface in interfaces():
-        # Ignore errors (may have no qdisc)
-        run(f'tc qdisc del dev {interface} parent ffff:')
-        run(f'tc qdisc del dev {interface} root')
-
-    call_dependents()
-
-    if not qos or 'interface' not in qos:
+def _get_applied_state():
+    """ Return the QoS state of the previous commit, None if unknown """
+    try:
+        return json.loads(read_file(qos_state_file))
+    except (FileNotFoundError, ValueError):
         return None
 
-    for interface, interface_config in qos['interface'].items():
-        if not verify_interface_exists(qos, interface, state_required=True, warning_only=True):
-            # When shaper is bound to a dialup (e.g. PPPoE) interface it is
-            # possible that it is yet not availbale when to QoS code runs.
-            # Skip the configuration and inform the user via warning_only=True
-            continue
 
-        for direction in ['egress', 'ingress']:
-            # bail out early if shaper for given direction is not used at all
-            if direction not in interface_config:
+def apply(qos):
+    applied = _get_applied_state()
+    # A failed commit leaves the kernel in an unknown state, drop the old
+    # state so the next commit starts from scratch
+    if os.path.exists(qos_state_file):
+        os.unlink(qos_state_file)
+
+    # Render the tc commands of every configured interface
+    desired = {}
+    if qos and 'interface' in qos:
+        for interface, interface_config in qos['interface'].items():
+            if not verify_interface_exists(qos, interface, state_required=True, warning_only=True):
+                # When shaper is bound to a dialup (e.g. PPPoE) interface it is
+                # possible that it is yet not availbale when to QoS code runs.
+                # Skip the configuration and inform the user via warning_only=True
                 continue
 
-            shaper_type, shaper_config = get_shaper(qos, interface_config, direction)
-            tmp = shaper_type(interface)
-            tmp.update(shaper_config, direction)
+            commands = []
+            for direction in ['egress', 'ingress']:
+                # bail out early if shaper for given direction is not used at all
+                if direction not in interface_config:
+                    continue
+
+                shaper_type, shaper_config = get_shaper(qos, interface_config, direction)
+                commands += shaper_type(interface).get_commands(shaper_config, direction)
+            desired[interface] = commands
+
+    # Only interfaces whose commands changed, or whose qdiscs were altered
+    # behind our back, are torn down and rebuilt
+    kernel = get_tc_qdiscs()
+    if applied is None:
+        stale = interfaces()
+    else:
+        always = (qos or {}).get('mirror_redirect', [])
+        stale = []
+        for interface in set(applied) | set(desired):
+            state = applied.get(interface, {})
+            if (interface in always or
+                    state.get('commands') != desired.get(interface) or
+                    state.get('qdiscs') != [list(q) for q in kernel.get(interface, [])]):
+                stale.append(interface)
+
+    # Delete "old" shapers first, ignore errors (may have no qdisc)
+    delete = []
+    for interface in stale:
+        delete.append(f'qdisc del dev {interface} parent ffff:')
+        delete.append(f'qdisc del dev {interface} root')
+    if delete:
+        run('tc -force -batch -', input='\n'.join(delete) + '\n')
+
+    call_dependents()
+
+    batch = []
+    for interface in stale:
+        batch += desired.get(interface, [])
+    tc_batch(batch)
+
+    kernel = get_tc_qdiscs()
+    state = {}
+    for interface, commands in desired.items():
+        state[interface] = {
+            'commands' : commands,
+            'qdiscs' : [list(q) for q in kernel.get(interface, [])],
+        }
+    write_file(qos_state_file, json.dumps(state))
 
     return None
 
@@ -35,10 +35,14 @@ def get_config(config=None):
     else:
         conf = Config()
 
-    base = ['service', 'event-handler', 'event']
+    base = ['service', 'event-handler']
+    if not conf.exists(base + ['event']):
+        return {}
+
     config = conf.get_config_dict(base,
                                   get_first_key=True,
-                                  no_tag_node_value_mangle=True)
+                                  no_tag_node_value_mangle=True,
+                                  with_recursive_defaults=True)
 
     return config
 
@@ -48,7 +52,7 @@ def verify(config):
     if not config:
         return None
 
-    for name, event_config in config.items():
+    for name, event_config in config['event'].items():
         if not dict_search('filter.pattern', event_config) or not dict_search(
                 'script.path', event_config):
             raise ConfigError(
@@ -19,57 +19,66 @@
 import socket
 import time
 
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob
+from ipaddress import ip_address
+from ipaddress import ip_network
 from vyos.utils.process import rc_cmd
 from pathlib import Path
+from pyroute2 import IPRoute
+from pyroute2.netlink.exceptions import NetlinkError
+from pyroute2.netlink.rtnl.rtmsg import RTNH_F_ONLINK
 from systemd import journal
 
 
 my_name = Path(__file__).stem
+# upper limit of concurrently running target checks
+max_probe_workers = 32
 
 
-def is_route_exists(route, gateway, interface, metric):
-    """Check if route with expected gateway, dev and metric exists"""
-    rc, data = rc_cmd(f'ip --json route show protocol failover {route} '
-                      f'via {gateway} dev {interface} metric {metric}')
-    if rc == 0:
-        data = json.loads(data)
-        if len(data) > 0:
-            return True
-    return False
-
-
-def get_best_route_options(route, debug=False):
+def get_protocol_id(name):
     """
-    Return current best route ('gateway, interface, metric)
-
-    % get_best_route_options('203.0.113.1')
-    ('192.168.0.1', 'eth1', 1)
+    Resolve routing protocol name to its numeric ID from the iproute2
+    rt_protos databases
 
-    % get_best_route_options('203.0.113.254')
-    (None, None, None)
+    % get_protocol_id('failover')
+    111
     """
-    rc, data = rc_cmd(f'ip --detail --json route show protocol failover {route}')
-    if rc == 0:
-        data = json.loads(data)
-        if len(data) == 0:
-            print(f'\nRoute {route} for protocol failover was not found')
-            return None, None, None
-        # Fake metric 999 by default
-        # Search route with the lowest metric
-        best_metric = 999
-        for entry in data:
-            if debug: print('\n', entry)
-            metric = entry.get('metric')
-            gateway = entry.get('gateway')
-            iface = entry.get('dev')
-            if metric < best_metric:
-                best_metric = metric
-                best_gateway = gateway
-                best_interface = iface
-        if debug:
-            print(f'### Best_route exists: {route}, best_gateway: {best_gateway}, '
-                  f'best_metric: {best_metric}, best_iface: {best_interface}')
-        return best_gateway, best_interface, best_metric
+    files = []
+    for base in ['/etc/iproute2', '/usr/share/iproute2', '/usr/lib/iproute2']:
+        files.append(f'{base}/rt_protos')
+        files.extend(sorted(glob(f'{base}/rt_protos.d/*.conf')))
+
+    for file in files:
+        try:
+            with open(file, 'r') as f:
+                for line in f:
+                    fields = line.split('#')[0].split()
+                    if len(fields) >= 2 and fields[1] == name:
+                        return int(fields[0], 0)
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def get_route_snapshot(ipr, proto_id):
+    """
+    Return a set of (route, gateway, ifindex, metric) tuples for all main table
+    routes installed by the failover protocol, from a single netlink dump
+    per address family
+    """
+    routes = set()
+    for family in (socket.AF_INET, socket.AF_INET6):
+        for msg in ipr.get_routes(family=family, table=254):
+            if msg['proto'] != proto_id:
+                continue
+            dst = msg.get_attr('RTA_DST')
+            if dst is None:
+                dst = '0.0.0.0' if family == socket.AF_INET else '::'
+            dst = str(ip_network(f'{dst}/{msg["dst_len"]}', strict=False))
+            routes.add((dst, msg.get_attr('RTA_GATEWAY'),
+                        msg.get_attr('RTA_OIF'), msg.get_attr('RTA_PRIORITY') or 0))
+    return routes
 
 
 def is_port_open(ip, port):
@@ -157,6 +166,77 @@ def is_target_alive(target_list=None,
     return False
 
 
+def get_next_hops(config):
+    """Flatten the failover configuration into a list of next-hop checks"""
+    next_hops = []
+    for route, route_config in config.get('route').items():
+        for next_hop, nexthop_config in route_config.get('next_hop').items():
+            check = nexthop_config.get('check')
+            next_hops.append({
+                'route': str(ip_network(route, strict=False)),
+                'next_hop': str(ip_address(next_hop)),
+                'interface': nexthop_config.get('interface'),
+                'metric': int(nexthop_config.get('metric')),
+                'onlink': 'onlink' in nexthop_config,
+                'port': check.get('port'),
+                'policy': check.get('policy'),
+                'proto': check.get('type'),
+                'target': check.get('target'),
+                'timeout': int(check.get('timeout')),
+            })
+    return next_hops
+
+
+def check_next_hop(nh, debug=False):
+    return is_target_alive(nh['target'], nh['interface'], nh['proto'],
+                           nh['port'], debug=debug, policy=nh['policy'])
+
+
+def update_route(ipr, nh, ifindex, proto_id, exists, alive, debug=False):
+    """Add or remove the route of a next-hop depending on its check result"""
+    route = nh['route']
+    next_hop = nh['next_hop']
+    conf_iface = nh['interface']
+    conf_metric = nh['metric']
+    onlink = 'onlink' if nh['onlink'] else ''
+    port_opt = f'port {nh["port"]}' if nh['port'] else ''
+
+    if not exists and alive:
+        if debug: print(f'    [ ADD ] -- ip route add {route} via {next_hop} dev {conf_iface} '
+                        f'metric {conf_metric} proto failover\n###')
+        try:
+            ipr.route('add', dst=route, gateway=next_hop, oif=ifindex,
+                      priority=conf_metric, proto=proto_id,
+                      flags=RTNH_F_ONLINK if onlink else 0)
+        except NetlinkError as e:
+            # If something is wrong and gateway not added
+            # Example: Error: Next-hop has invalid gateway.
+            if debug: print(f'{e} -- {next_hop} dev {conf_iface}')
+        else:
+            journal.send(f'ip route add {route} via {next_hop} dev {conf_iface} '
+                         f'{onlink} metric {conf_metric} proto failover', SYSLOG_IDENTIFIER=my_name)
+
+    elif not exists and not alive:
+        if debug: print(f'    [ TARGET_FAIL ] target checks fails for [{nh["target"]}], do nothing')
+        journal.send(f'Check fail for route {route} target {nh["target"]} proto {nh["proto"]} '
+                     f'{port_opt}', SYSLOG_IDENTIFIER=my_name)
+
+    # We should delete route if check fails only if route exists in the routing table
+    elif exists and not alive:
+        if debug:
+            print(f'Nexh_hop {next_hop} fail, target not response')
+            print(f'    [ DEL ] -- ip route del {route} via {next_hop} dev {conf_iface} '
+                  f'metric {conf_metric} proto failover [DELETE]')
+        try:
+            ipr.route('del', dst=route, gateway=next_hop, oif=ifindex,
+                      priority=conf_metric, proto=proto_id)
+        except NetlinkError as e:
+            if debug: print(f'{e} -- {next_hop} dev {conf_iface}')
+        else:
+            journal.send(f'ip route del {route} via {next_hop} dev {conf_iface} '
+                         f'metric {conf_metric} proto failover', SYSLOG_IDENTIFIER=my_name)
+
+
 if __name__ == '__main__':
     # Parse command arguments and get config
     parser = argparse.ArgumentParser()
@@ -182,54 +262,46 @@ def is_target_alive(target_list=None,
     # sudo /usr/libexec/vyos/vyos-failover.py --config /run/vyos-failover.conf
     debug = False
 
-    while(True):
-
-        for route, route_config in config.get('route').items():
-
-            exists_gateway, exists_iface, exists_metric =  get_best_route_options(route, debug=debug)
-
-            for next_hop, nexthop_config in route_config.get('next_hop').items():
-                conf_iface = nexthop_config.get('interface')
-                conf_metric = int(nexthop_config.get('metric'))
-                port = nexthop_config.get('check').get('port')
-                port_opt = f'port {port}' if port else ''
-                policy = nexthop_config.get('check').get('policy')
-                proto = nexthop_config.get('check').get('type')
-                target = nexthop_config.get('check').get('target')
-                timeout = nexthop_config.get('check').get('timeout')
-                onlink = 'onlink' if 'onlink' in nexthop_config else ''
-
-                # Route not found in the current routing table
-                if not is_route_exists(route, next_hop, conf_iface, conf_metric):
-                    if debug: print(f"    [NEW_ROUTE_DETECTED] route: [{route}]")
-                    # Add route if check-target alive
-                    if is_target_alive(target, conf_iface, proto, port, debug=debug, policy=policy):
-                        if debug: print(f'    [ ADD ] -- ip route add {route} via {next_hop} dev {conf_iface} '
-                                        f'metric {conf_metric} proto failover\n###')
-                        rc, command = rc_cmd(f'ip route add {route} via {next_hop} dev {conf_iface} '
-                                             f'{onlink} metric {conf_metric} proto failover')
-                        # If something is wrong and gateway not added
-                        # Example: Error: Next-hop has invalid gateway.
-                        if rc !=0:
-                            if debug: print(f'{command} -- return-code [RC: {rc}] {next_hop} dev {conf_iface}')
-                        else:
-                            journal.send(f'ip route add {route} via {next_hop} dev {conf_iface} '
-                                         f'{onlink} metric {conf_metric} proto failover', SYSLOG_IDENTIFIER=my_name)
-                    else:
-                        if debug: print(f'    [ TARGET_FAIL ] target checks fails for [{target}], do nothing')
-                        journal.send(f'Check fail for route {route} target {target} proto {proto} '
-                                     f'{port_opt}', SYSLOG_IDENTIFIER=my_name)
-
-                # Route was added, check if the target is alive
-                # We should delete route if check fails only if route exists in the routing table
-                if not is_target_alive(target, conf_iface, proto, port, debug=debug, policy=policy) and \
-                        is_route_exists(route, next_hop, conf_iface, conf_metric):
-                    if debug:
-                        print(f'Nexh_hop {next_hop} fail, target not response')
-                        print(f'    [ DEL ] -- ip route del {route} via {next_hop} dev {conf_iface} '
-                              f'metric {conf_metric} proto failover [DELETE]')
-                    rc_cmd(f'ip route del {route} via {next_hop} dev {conf_iface} metric {conf_metric} proto failover')
-                    journal.send(f'ip route del {route} via {next_hop} dev {conf_iface} '
-                                 f'metric {conf_metric} proto failover', SYSLOG_IDENTIFIER=my_name)
-
-                time.sleep(int(timeout))
+    proto_id = get_protocol_id('failover')
+    if proto_id is None:
+        print('Routing protocol "failover" is not defined in rt_protos')
+        exit(1)
+
+    next_hops = get_next_hops(config)
+    if not next_hops:
+        exit(0)
+
+    # Every next-hop is checked in its own interval (check timeout), checks
+    # that are due at the same time run concurrently
+    next_check = [0.0] * len(next_hops)
+    max_workers = min(max_probe_workers, len(next_hops))
+
+    with IPRoute() as ipr, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while(True):
+            now = time.monotonic()
+            due = [i for i, t in enumerate(next_check) if t <= now]
+
+            futures = {i: executor.submit(check_next_hop, next_hops[i], debug) for i in due}
+
+            # One routing table and link snapshot per cycle
+            routes = get_route_snapshot(ipr, proto_id)
+            ifindexes = {link.get_attr('IFLA_IFNAME'): link['index'] for link in ipr.get_links()}
+
+            for i in due:
+                nh = next_hops[i]
+                try:
+                    alive = futures[i].result()
+                except Exception as e:
+                    if debug: print(f'Check for {nh["next_hop"]} failed: {e}')
+                    alive = False
+
+                ifindex = ifindexes.get(nh['interface'])
+                exists = (nh['route'], nh['next_hop'], ifindex, nh['metric']) in routes
+                if ifindex is None:
+                    if debug: print(f'Interface {nh["interface"]} does not exist')
+                else:
+                    update_route(ipr, nh, ifindex, proto_id, exists, alive, debug=debug)
+
+                next_check[i] = time.monotonic() + nh['timeout']
+
+            time.sleep(max(0.0, min(next_check) - time.monotonic()))
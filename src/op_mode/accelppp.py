@@ -16,6 +16,7 @@
 #
 
 import sys
+import typing
 
 import vyos.accel_ppp
 import vyos.opmode
@@ -74,14 +75,37 @@ def _get_raw_statistics(accel_output, pattern, protocol):
     }
 
 
-def _get_raw_sessions(port):
-    cmd_options = 'show sessions ifname,username,ip,ip6,ip6-dp,type,rate-limit,' \
-                  'state,uptime-raw,calling-sid,called-sid,sid,comp,rx-bytes-raw,' \
-                  'tx-bytes-raw,rx-pkts,tx-pkts'
-    output = vyos.accel_ppp.accel_cmd(port, cmd_options)
-    parsed_data: list[dict[str, str]] = vyos.accel_ppp.accel_out_parse(
-        output.splitlines())
-    return parsed_data
+raw_session_options = 'show sessions ifname,username,ip,ip6,ip6-dp,type,rate-limit,' \
+                      'state,uptime-raw,calling-sid,called-sid,sid,comp,rx-bytes-raw,' \
+                      'tx-bytes-raw,rx-pkts,tx-pkts'
+session_options = 'show sessions ifname,username,ip,ip6,ip6-dp,' \
+                  'calling-sid,rate-limit,state,uptime,rx-bytes,tx-bytes'
+
+
+def _get_sessions(port, cmd_options, username=None, address=None,
+                  interface=None, limit=None, offset=0):
+    index = vyos.accel_ppp.get_session_index(port, cmd_options)
+    sessions = index.find(username=username, ip=address, ifname=interface)
+    if offset or limit is not None:
+        stop = offset + limit if limit is not None else None
+        sessions = sessions[offset:stop]
+    return sessions
+
+
+def _get_raw_sessions(port, username=None, address=None, interface=None,
+                      limit=None, offset=0):
+    return _get_sessions(port, raw_session_options, username=username,
+                         address=address, interface=interface, limit=limit,
+                         offset=offset)
+
+
+def _get_formatted_sessions(sessions):
+    from tabulate import tabulate
+
+    if not sessions:
+        return 'No matching sessions found'
+    headers = list(sessions[0].keys())
+    return tabulate([list(session.values()) for session in sessions], headers)
 
 
 def _verify(func):
@@ -131,18 +155,36 @@ def show_statistics(raw: bool, protocol: str):
 
 
 @_verify
-def show_sessions(raw: bool, protocol: str):
+def show_sessions(raw: bool, protocol: str,
+                  username: typing.Optional[str] = None,
+                  address: typing.Optional[str] = None,
+                  interface: typing.Optional[str] = None,
+                  limit: typing.Optional[int] = None,
+                  offset: typing.Optional[int] = None):
     """show accel-cmd sessions
 
     protocol: ipoe/pppoe/ppptp/l2tp/sstp
+    username/address/interface: only show sessions matching all given filters
+    limit/offset: page through the matching sessions
     """
+    if limit is not None and limit < 0:
+        raise vyos.opmode.IncorrectValue(f'Invalid limit "{limit}"')
+    if offset is not None and offset < 0:
+        raise vyos.opmode.IncorrectValue(f'Invalid offset "{offset}"')
+
     port = accel_dict[protocol]['port']
     if raw:
-        return _get_raw_sessions(port)
+        return _get_raw_sessions(port, username=username, address=address,
+                                 interface=interface, limit=limit,
+                                 offset=offset or 0)
+
+    if all(arg is None for arg in [username, address, interface, limit, offset]):
+        return vyos.accel_ppp.accel_cmd(port, session_options)
 
-    return vyos.accel_ppp.accel_cmd(port,
-                                    'show sessions ifname,username,ip,ip6,ip6-dp,'
-                                    'calling-sid,rate-limit,state,uptime,rx-bytes,tx-bytes')
+    sessions = _get_sessions(port, session_options, username=username,
+                             address=address, interface=interface,
+                             limit=limit, offset=offset or 0)
+    return _get_formatted_sessions(sessions)
 
 
 if __name__ == '__main__':
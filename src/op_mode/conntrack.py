@@ -14,9 +14,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import socket
 import sys
 import typing
-import xmltodict
+
+from ipaddress import ip_address
+from ipaddress import ip_network
+from itertools import islice
 
 from tabulate import tabulate
 from vyos.utils.process import cmd
@@ -24,32 +28,158 @@
 import vyos.opmode
 
 ArgFamily = typing.Literal['inet', 'inet6']
+ArgProtocol = typing.Literal['tcp', 'udp', 'icmp', 'icmpv6', 'sctp', 'gre']
+
+PROTOCOL_NUMBERS = {
+    'icmp': socket.IPPROTO_ICMP,
+    'tcp': socket.IPPROTO_TCP,
+    'udp': socket.IPPROTO_UDP,
+    'gre': socket.IPPROTO_GRE,
+    'icmpv6': socket.IPPROTO_ICMPV6,
+    'sctp': socket.IPPROTO_SCTP,
+}
+PROTOCOL_NAMES = {v: k for k, v in PROTOCOL_NUMBERS.items()}
+
+# include/uapi/linux/netfilter/nf_conntrack_tcp.h, as named by conntrack(8)
+TCP_STATE_NAMES = ['NONE', 'SYN_SENT', 'SYN_RECV', 'ESTABLISHED', 'FIN_WAIT',
+                   'CLOSE_WAIT', 'LAST_ACK', 'TIME_WAIT', 'CLOSE', 'SYN_SENT2']
 
-def _get_xml_data(family):
+FAMILY_ATTRS = {
+    socket.AF_INET: ('ipv4', 'CTA_IP_V4_SRC', 'CTA_IP_V4_DST'),
+    socket.AF_INET6: ('ipv6', 'CTA_IP_V6_SRC', 'CTA_IP_V6_DST'),
+}
+
+
+def _flow_meta(direction, family, cta_tuple):
     """
-    Get conntrack XML output
+    Convert a conntrack tuple to the 'meta' layout of conntrack XML output
     """
-    return cmd(f'sudo conntrack --dump --family {family} --output xml')
+    l3name, src_attr, dst_attr = FAMILY_ATTRS[family]
+    cta_ip = cta_tuple.get_attr('CTA_TUPLE_IP')
+    cta_proto = cta_tuple.get_attr('CTA_TUPLE_PROTO')
+    protonum = cta_proto.get_attr('CTA_PROTO_NUM')
+
+    layer4 = {'protonum': str(protonum),
+              'protoname': PROTOCOL_NAMES.get(protonum, 'unknown')}
+    sport = cta_proto.get_attr('CTA_PROTO_SRC_PORT')
+    if sport is not None:
+        layer4['sport'] = str(sport)
+    dport = cta_proto.get_attr('CTA_PROTO_DST_PORT')
+    if dport is not None:
+        layer4['dport'] = str(dport)
 
+    return {
+        'direction': direction,
+        'layer3': {'protonum': str(family), 'protoname': l3name,
+                   'src': cta_ip.get_attr(src_attr),
+                   'dst': cta_ip.get_attr(dst_attr)},
+        'layer4': layer4,
+    }
 
-def _xml_to_dict(xml):
+
+def _flow_from_msg(msg):
     """
-    Convert XML to dictionary
-    Return: dictionary
+    Convert a ctnetlink message to a flow entry in the layout of
+    conntrack XML output, as parsed by xmltodict
+    """
+    from pyroute2.netlink.nfnetlink.nfctsocket import IPS_ASSURED
+    from pyroute2.netlink.nfnetlink.nfctsocket import IPS_SEEN_REPLY
+
+    family = msg['nfgen_family']
+    independent = {'direction': 'independent', 'id': str(msg.get_attr('CTA_ID'))}
+
+    if (timeout := msg.get_attr('CTA_TIMEOUT')) is not None:
+        independent['timeout'] = str(timeout)
+    if protoinfo := msg.get_attr('CTA_PROTOINFO'):
+        if tcp := protoinfo.get_attr('CTA_PROTOINFO_TCP'):
+            state = tcp.get_attr('CTA_PROTOINFO_TCP_STATE')
+            if state is not None and state < len(TCP_STATE_NAMES):
+                independent['state'] = TCP_STATE_NAMES[state]
+    independent['mark'] = str(msg.get_attr('CTA_MARK') or 0)
+    if zone := msg.get_attr('CTA_ZONE'):
+        independent['zone'] = str(zone)
+    if (use := msg.get_attr('CTA_USE')) is not None:
+        independent['use'] = str(use)
+    status = msg.get_attr('CTA_STATUS') or 0
+    if status & IPS_ASSURED:
+        independent['assured'] = None
+    if not status & IPS_SEEN_REPLY:
+        independent['unreplied'] = None
+
+    return {'meta': [
+        _flow_meta('original', family, msg.get_attr('CTA_TUPLE_ORIG')),
+        _flow_meta('reply', family, msg.get_attr('CTA_TUPLE_REPLY')),
+        independent,
+    ]}
+
+
+def _address_filter(prefix):
+    """
+    Return (exact address for kernel side filtering, network for client
+    side filtering); either may be None
+    """
+    if prefix is None:
+        return None, None
+    network = ip_network(prefix, strict=False)
+    if network.num_addresses == 1:
+        return str(network.network_address), None
+    return None, network
+
+
+def _iter_flows(family, protocol=None, source=None, destination=None,
+                zone=None, mark=None):
     """
-    parse = xmltodict.parse(xml, attr_prefix='')
-    # If only one conntrack entry we must change dict
-    if 'meta' in parse['conntrack']['flow']:
-        return dict(conntrack={'flow': [parse['conntrack']['flow']]})
-    return parse
+    Stream conntrack entries over ctnetlink, one flow at a time.
+
+    Protocol and single source/destination addresses are filtered by the
+    kernel; prefixes and zone are filtered while streaming. pyroute2 only
+    sends a non-zero mark filter when there is no tuple filter, in every
+    other case the mark is filtered while streaming as well.
+    """
+    from pyroute2 import conntrack
+    from pyroute2.netlink.nfnetlink.nfctsocket import NFCTAttrTuple
+
+    nfgen_family = socket.AF_INET6 if family == 'ipv6' else socket.AF_INET
+    _, src_attr, dst_attr = FAMILY_ATTRS[nfgen_family]
+    saddr, src_net = _address_filter(source)
+    daddr, dst_net = _address_filter(destination)
+    proto = PROTOCOL_NUMBERS[protocol] if protocol else None
+
+    tuple_orig = None
+    if any(x is not None for x in (saddr, daddr, proto)):
+        tuple_orig = NFCTAttrTuple(family=nfgen_family, saddr=saddr,
+                                   daddr=daddr, proto=proto)
+
+    kernel_mark = mark if tuple_orig is None and mark else None
+
+    with conntrack.Conntrack(nfgen_family=nfgen_family) as ct:
+        for msg in ct.dump(mark=kernel_mark, tuple_orig=tuple_orig):
+            if msg['nfgen_family'] != nfgen_family:
+                continue
+            if zone is not None and (msg.get_attr('CTA_ZONE') or 0) != zone:
+                continue
+            if mark is not None and kernel_mark is None and \
+                    (msg.get_attr('CTA_MARK') or 0) != mark:
+                continue
+            if src_net or dst_net:
+                cta_ip = msg.get_nested('CTA_TUPLE_ORIG', 'CTA_TUPLE_IP')
+                if src_net and ip_address(cta_ip.get_attr(src_attr)) not in src_net:
+                    continue
+                if dst_net and ip_address(cta_ip.get_attr(dst_attr)) not in dst_net:
+                    continue
+            yield _flow_from_msg(msg)
 
 
-def _get_raw_data(family):
+def _get_raw_data(family, protocol=None, source=None, destination=None,
+                  zone=None, mark=None, limit=None, offset=0):
     """
     Return: dictionary
     """
-    xml = _get_xml_data(family)
-    if len(xml) == 0:
+    flows = _iter_flows(family, protocol=protocol, source=source,
+                        destination=destination, zone=zone, mark=mark)
+    stop = offset + limit if limit is not None else None
+    flow = list(islice(flows, offset, stop))
+    if not flow:
         output = {'conntrack':
             {
                 'error': True,
@@ -57,7 +187,7 @@ def _get_raw_data(family):
             }
         }
         return output
-    return _xml_to_dict(xml)
+    return {'conntrack': {'flow': flow}}
 
 
 def _get_raw_statistics():
@@ -145,9 +275,31 @@ def get_formatted_output(dict_data):
     return output
 
 
-def show(raw: bool, family: ArgFamily):
+def show(raw: bool, family: ArgFamily,
+         protocol: typing.Optional[ArgProtocol] = None,
+         source: typing.Optional[str] = None,
+         destination: typing.Optional[str] = None,
+         zone: typing.Optional[int] = None,
+         mark: typing.Optional[int] = None,
+         limit: typing.Optional[int] = None,
+         offset: typing.Optional[int] = None):
     family = 'ipv6' if family == 'inet6' else 'ipv4'
-    conntrack_data = _get_raw_data(family)
+    version = 6 if family == 'ipv6' else 4
+    if limit is not None and limit < 0:
+        raise vyos.opmode.IncorrectValue('Limit must not be negative')
+    if offset is not None and offset < 0:
+        raise vyos.opmode.IncorrectValue('Offset must not be negative')
+    for prefix in (source, destination):
+        if prefix is not None:
+            try:
+                network = ip_network(prefix, strict=False)
+            except ValueError:
+                raise vyos.opmode.IncorrectValue(f'Invalid prefix "{prefix}"')
+            if network.version != version:
+                raise vyos.opmode.IncorrectValue(f'Prefix "{prefix}" does not match address family')
+    conntrack_data = _get_raw_data(family, protocol=protocol, source=source,
+                                   destination=destination, zone=zone,
+                                   mark=mark, limit=limit, offset=offset or 0)
     if raw:
         return conntrack_data
     else:
@@ -18,6 +18,7 @@
 import sys
 import typing
 
+from collections import Counter
 from datetime import datetime
 from glob import glob
 from ipaddress import ip_address
@@ -29,8 +30,9 @@
 from vyos.configquery import ConfigTreeQuery
 
 from vyos.kea import kea_get_active_config
-from vyos.kea import kea_get_leases
-from vyos.kea import kea_get_pool_from_subnet_id
+from vyos.kea import kea_get_lease
+from vyos.kea import kea_iter_leases
+from vyos.kea import kea_get_pool_map
 from vyos.kea import kea_delete_lease
 from vyos.utils.process import is_systemd_service_running
 from vyos.utils.process import call
@@ -62,62 +64,96 @@ def _format_hex_string(in_str):
     return out_str
 
 
-def _find_list_of_dict_index(lst, key='ip', value='') -> int:
-    """
-    Find the index entry of list of dict matching the dict value
-    Exampe:
-        % lst = [{'ip': '192.0.2.1'}, {'ip': '192.0.2.2'}]
-        % _find_list_of_dict_index(lst, key='ip', value='192.0.2.2')
-        % 1
-    """
-    idx = next((index for (index, d) in enumerate(lst) if d[key] == value), None)
-    return idx
+def _fetch_server_leases(inet, subnets):
+    leases = kea_iter_leases(inet, subnets=subnets)
+    while True:
+        try:
+            lease = next(leases)
+        except StopIteration:
+            return
+        except:
+            raise vyos.opmode.DataUnavailable('Cannot fetch DHCP server lease information')
+        yield lease
 
 
-def _get_raw_server_leases(family='inet', pool=None, sorted=None, state=[], origin=None) -> list:
+def _get_raw_server_leases(family='inet', pool=None, sorted=None, state=[], origin=None,
+                           limit=None, offset=0) -> list:
     """
     Get DHCP server leases
     :return list
     """
     inet_suffix = '6' if family == 'inet6' else '4'
     try:
-        leases = kea_get_leases(inet_suffix)
+        active_config = kea_get_active_config(inet_suffix)
     except:
-        raise vyos.opmode.DataUnavailable('Cannot fetch DHCP server lease information')
+        raise vyos.opmode.DataUnavailable('Cannot fetch DHCP server configuration')
 
+    # Only let Kea filter by subnet for an explicit pool, a full lease dump
+    # is transferred page by page
+    filter_subnets = pool is not None
     if pool is None:
         pool = _get_dhcp_pools(family=family)
     else:
         pool = [pool]
+    pool = set(pool)
 
-    try:
-        active_config = kea_get_active_config(inet_suffix)
-    except:
-        raise vyos.opmode.DataUnavailable('Cannot fetch DHCP server configuration')
+    if isinstance(state, str):
+        state = [state]
+
+    # Subnet ID to pool name lookup table, built once instead of per lease
+    pool_map = kea_get_pool_map(active_config, inet_suffix) if active_config else {}
+    subnets = None
+    if filter_subnets:
+        subnets = [subnet_id for subnet_id, name in pool_map.items() if name in pool]
+
+    # Leases are fetched from Kea and processed one page at a time
+    leases = _fetch_server_leases(inet_suffix, subnets)
+
+    lease_state_long = {0: 'active', 1: 'rejected', 2: 'expired'}
+    now = datetime.utcnow()
 
-    data = []
+    # Without sorting only the leases up to the requested page are needed,
+    # stop fetching further pages from Kea once they are collected
+    stop = None
+    if not sorted and limit is not None:
+        stop = offset + limit
+
+    # Deduplicate on IP address, the most recent lease wins
+    data = {}
     for lease in leases:
+        if stop is not None and len(data) >= stop:
+            break
+        if active_config:
+            lease_pool = pool_map.get(int(lease['subnet-id']))
+        else:
+            lease_pool = '-'
+
+        lease_state = lease_state_long[lease['state']]
+        if lease_pool not in pool or lease_state == 'free':
+            continue
+        if state and 'all' not in state and lease_state not in state:
+            continue
+
         lifetime = lease['valid-lft']
         expiry = (lease['cltt'] + lifetime)
 
-        lease['start_timestamp'] = datetime.utcfromtimestamp(expiry - lifetime)
-        lease['expire_timestamp'] = datetime.utcfromtimestamp(expiry) if expiry else None
+        start_timestamp = datetime.utcfromtimestamp(expiry - lifetime)
+        expire_timestamp = datetime.utcfromtimestamp(expiry) if expiry else None
 
         data_lease = {}
         data_lease['ip'] = lease['ip-address']
-        lease_state_long = {0: 'active', 1: 'rejected', 2: 'expired'}
-        data_lease['state'] = lease_state_long[lease['state']]
-        data_lease['pool'] = kea_get_pool_from_subnet_id(active_config, inet_suffix, lease['subnet-id']) if active_config else '-'
-        data_lease['end'] = lease['expire_timestamp'].timestamp() if lease['expire_timestamp'] else None
+        data_lease['state'] = lease_state
+        data_lease['pool'] = lease_pool
+        data_lease['end'] = expire_timestamp.timestamp() if expire_timestamp else None
         data_lease['origin'] = 'local' # TODO: Determine remote in HA
 
         if family == 'inet':
             data_lease['mac'] = lease['hw-address']
-            data_lease['start'] = lease['start_timestamp'].timestamp()
+            data_lease['start'] = start_timestamp.timestamp()
             data_lease['hostname'] = lease['hostname']
 
         if family == 'inet6':
-            data_lease['last_communication'] = lease['start_timestamp'].timestamp()
+            data_lease['last_communication'] = start_timestamp.timestamp()
             data_lease['duid'] = _format_hex_string(lease['duid'])
             data_lease['type'] = lease['type']
 
@@ -128,33 +164,27 @@ def _get_raw_server_leases(family='inet', pool=None, sorted=None, state=[], orig
         data_lease['remaining'] = '-'
 
         if lease['valid-lft'] > 0:
-            data_lease['remaining'] = lease['expire_timestamp'] - datetime.utcnow()
+            data_lease['remaining'] = expire_timestamp - now
 
             if data_lease['remaining'].days >= 0:
                 # substraction gives us a timedelta object which can't be formatted with strftime
                 # so we use str(), split gets rid of the microseconds
                 data_lease['remaining'] = str(data_lease["remaining"]).split('.')[0]
 
-        # Do not add old leases
-        if data_lease['remaining'] != '' and data_lease['pool'] in pool and data_lease['state'] != 'free':
-            if not state or state == 'all' or data_lease['state'] in state:
-                data.append(data_lease)
-
-        # deduplicate
-        checked = []
-        for entry in data:
-            addr = entry.get('ip')
-            if addr not in checked:
-                checked.append(addr)
-            else:
-                idx = _find_list_of_dict_index(data, key='ip', value=addr)
-                data.pop(idx)
+        data.pop(data_lease['ip'], None)
+        data[data_lease['ip']] = data_lease
 
+    data = list(data.values())
     if sorted:
         if sorted == 'ip':
-            data.sort(key = lambda x:ip_address(x['ip']))
+            # IA_PD leases carry the delegated prefix length
+            data.sort(key = lambda x:ip_address(x['ip'].split('/')[0]))
         else:
             data.sort(key = lambda x:x[sorted])
+
+    if offset or limit is not None:
+        stop = offset + limit if limit is not None else None
+        data = data[offset:stop]
     return data
 
 
@@ -230,12 +260,16 @@ def _get_raw_pool_statistics(family='inet', pool=None):
     else:
         pool = [pool]
 
+    # Fetch all leases once and count them per pool
+    lease_count = Counter(lease['pool'] for lease in
+                          _get_raw_server_leases(family=family, pool=pool[0] if len(pool) == 1 else None))
+
     v = 'v6' if family == 'inet6' else ''
     stats = []
     for p in pool:
         subnet = config.list_nodes(f'service dhcp{v}-server shared-network-name {p} subnet')
         size = _get_pool_size(family=family, pool=p)
-        leases = len(_get_raw_server_leases(family=family, pool=p))
+        leases = lease_count[p]
         use_percentage = round(leases / size * 100) if size != 0 else 0
         pool_stats = {'pool': p, 'size': size, 'leases': leases,
                       'available': (size - leases), 'use_percentage': use_percentage, 'subnet': subnet}
@@ -348,7 +382,9 @@ def show_pool_statistics(raw: bool, family: ArgFamily, pool: typing.Optional[str
 @_verify
 def show_server_leases(raw: bool, family: ArgFamily, pool: typing.Optional[str],
                        sorted: typing.Optional[str], state: typing.Optional[ArgState],
-                       origin: typing.Optional[ArgOrigin] ):
+                       origin: typing.Optional[ArgOrigin],
+                       limit: typing.Optional[int] = None,
+                       offset: typing.Optional[int] = None):
     # if dhcp server is down, inactive leases may still be shown as active, so warn the user.
     v = '6' if family == 'inet6' else '4'
     if not is_systemd_service_running(f'kea-dhcp{v}-server.service'):
@@ -365,7 +401,8 @@ def show_server_leases(raw: bool, family: ArgFamily, pool: typing.Optional[str],
     if sorted and sorted not in sort_valid:
         raise vyos.opmode.IncorrectValue(f'DHCP{v} sort "{sorted}" is invalid!')
 
-    lease_data = _get_raw_server_leases(family=family, pool=pool, sorted=sorted, state=state, origin=origin)
+    lease_data = _get_raw_server_leases(family=family, pool=pool, sorted=sorted, state=state,
+                                        origin=origin, limit=limit, offset=offset or 0)
     if raw:
         return lease_data
     else:
@@ -388,11 +425,7 @@ def show_server_static_mappings(raw: bool, family: ArgFamily, pool: typing.Optio
         return _get_formatted_server_static_mappings(static_mappings, family=family)
 
 def _lease_valid(inet, address):
-    leases = kea_get_leases(inet)
-    for lease in leases:
-        if address == lease['ip-address']:
-            return True
-    return False
+    return kea_get_lease(inet, address) is not None
 
 @_verify
 def clear_dhcp_server_lease(family: ArgFamily, address: str):
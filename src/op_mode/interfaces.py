@@ -28,6 +28,7 @@
 from vyos.ifconfig import Section
 from vyos.ifconfig import Interface
 from vyos.ifconfig import VRRP
+from vyos.ifconfig.operational import get_link_snapshot
 from vyos.utils.process import cmd
 from vyos.utils.process import rc_cmd
 from vyos.utils.process import call
@@ -146,6 +147,29 @@ def _pppoe(ifname):
         return 'D'
     return ''
 
+def _get_interfaces(ifname, iftype, vif, vrrp) -> list:
+    """
+    Return the filtered interfaces; if there is more than one, read state
+    and counters of all interfaces with a single netlink dump up front
+    """
+    interfaces = list(filtered_interfaces(ifname, iftype, vif, vrrp))
+    if len(interfaces) > 1:
+        get_link_snapshot()
+    return interfaces
+
+def _get_addr_data(interfaces: list) -> dict:
+    """
+    Return 'ip -json addr show' output of the interfaces indexed by name,
+    fetched with a single call for all interfaces if there is more than one
+    """
+    if len(interfaces) > 1:
+        out = cmd('ip -json addr show')
+    elif interfaces:
+        out = cmd(f'ip -json addr show dev {interfaces[0].ifname}')
+    else:
+        return {}
+    return {intf['ifname']: intf for intf in json.loads(out)}
+
 def _find_intf_by_ifname(intf_l: list, name: str):
     for d in intf_l:
         if d['ifname'] == name:
@@ -186,19 +210,24 @@ def _get_raw_data(ifname: typing.Optional[str],
     if iftype is None:
         iftype = ''
     ret =[]
-    for interface in filtered_interfaces(ifname, iftype, vif, vrrp):
+    interfaces = _get_interfaces(ifname, iftype, vif, vrrp)
+    addr_data = _get_addr_data(interfaces)
+    tunnel = None
+    for interface in interfaces:
         res_intf = {}
         cache = interface.operational.load_counters()
 
-        out = cmd(f'ip -json addr show {interface.ifname}')
-        res_intf_l = json.loads(out)
-        res_intf = res_intf_l[0]
+        if interface.ifname not in addr_data:
+            # interface vanished since it was listed
+            continue
+        res_intf = addr_data[interface.ifname]
 
         if res_intf['link_type'] == 'tunnel6':
             # Note that 'ip -6 tun show {interface.ifname}' is not json
             # aware, so find in list
-            out = cmd('ip -json -6 tun show')
-            tunnel = json.loads(out)
+            if tunnel is None:
+                out = cmd('ip -json -6 tun show')
+                tunnel = json.loads(out)
             res_intf['tunnel6'] = _find_intf_by_ifname(tunnel,
                                                        interface.ifname)
             if 'ip6_tnl_f_use_orig_tclass' in res_intf['tunnel6']:
@@ -240,13 +269,20 @@ def is_interface_has_mac(interface_name):
         interface_no_mac = ('tun', 'wg')
         return not any(interface_name.startswith(prefix) for prefix in interface_no_mac)
 
-    for interface in filtered_interfaces(ifname, iftype, vif, vrrp):
+    interfaces = _get_interfaces(ifname, iftype, vif, vrrp)
+    addr_data = _get_addr_data(interfaces)
+    for interface in interfaces:
         res_intf = {}
 
+        addr_info = addr_data.get(interface.ifname, {}).get('addr_info', [])
+        # IPv4 addresses are listed before IPv6 addresses
+        addr = [f'{a["local"]}/{a["prefixlen"]}' for a in addr_info if a.get('family') == 'inet'] + \
+               [f'{a["local"]}/{a["prefixlen"]}' for a in addr_info if a.get('family') == 'inet6']
+
         res_intf['ifname'] = interface.ifname
         res_intf['oper_state'] = interface.operational.get_state()
         res_intf['admin_state'] = interface.get_admin_state()
-        res_intf['addr'] = [_ for _ in interface.get_addr() if not _.startswith('fe80::')]
+        res_intf['addr'] = [_ for _ in addr if not _.startswith('fe80::')]
         res_intf['description'] = interface.get_alias()
         res_intf['mtu'] = interface.get_mtu()
         res_intf['mac'] = interface.get_mac() if is_interface_has_mac(interface.ifname) else 'n/a'
@@ -272,7 +308,7 @@ def _get_counter_data(ifname: typing.Optional[str],
     if iftype is None:
         iftype = ''
     ret = []
-    for interface in filtered_interfaces(ifname, iftype, vif, vrrp):
+    for interface in _get_interfaces(ifname, iftype, vif, vrrp):
         res_intf = {}
 
         oper = interface.operational.get_state()
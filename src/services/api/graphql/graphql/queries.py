@@ -27,6 +27,7 @@
 from ...session import SessionState
 from ..libs import key_auth
 from ..session.session import Session
+from ..session.session import resolve_op_mode_name
 from ..session.errors.op_mode_errors import op_mode_err_msg, op_mode_err_code
 
 query = ObjectType('Query')
@@ -50,6 +51,16 @@ def make_query_resolver(query_name, class_name, session_func):
     func_sig = '(obj: Any, info: GraphQLResolveInfo, data: Optional[Dict]=None)'
     state = SessionState()
 
+    # one may override the session functions with a local subclass; resolved
+    # once here rather than on every request
+    try:
+        mod = import_module(f'api.graphql.session.override.{func_base_name}')
+        klass = getattr(mod, class_name)
+    except ImportError:
+        # otherwise, dynamically generate subclass to invoke subclass
+        # name based functions
+        klass = type(class_name, (Session,), {})
+
     @query.field(query_name)
     @with_signature(func_sig, func_name=resolver_name)
     async def func_impl(*args, **kwargs):
@@ -87,14 +98,6 @@ async def func_impl(*args, **kwargs):
 
             session = state.session
 
-            # one may override the session functions with a local subclass
-            try:
-                mod = import_module(f'api.graphql.session.override.{func_base_name}')
-                klass = getattr(mod, class_name)
-            except ImportError:
-                # otherwise, dynamically generate subclass to invoke subclass
-                # name based functions
-                klass = type(class_name, (Session,), {})
             k = klass(session, data)
             method = getattr(k, session_func)
             result = method()
@@ -126,6 +129,11 @@ def make_config_session_query_resolver(query_name):
 
 
 def make_gen_op_query_resolver(query_name):
+    # fill the resolver registry at schema generation
+    try:
+        resolve_op_mode_name(convert_camel_case_to_snake(query_name))
+    except FileNotFoundError:
+        pass
     return make_query_resolver(query_name, query_name, 'gen_op_query')
 
 
@@ -21,15 +21,36 @@
 from typing import Optional
 from humps import decamelize
 
+from vyos.defaults import commit_stamp
 from vyos.defaults import directories
 from vyos.utils.system import load_as_module
 from vyos.opmode import _normalize_field_names
 from vyos.opmode import _is_literal_type, _get_literal_values
 
+# Loaded op-mode modules, kept until the next commit: some scripts query the
+# configuration when they are loaded
+_op_mode_modules = {}
+
+def config_version():
+    """ Version of the running config, None if unknown """
+    try:
+        return os.stat(commit_stamp).st_mtime_ns
+    except OSError:
+        return None
+
 def load_op_mode_as_module(name: str):
+    version = config_version()
+    if version is not None and name in _op_mode_modules:
+        mod_version, mod = _op_mode_modules[name]
+        if mod_version == version:
+            return mod
+
     path = os.path.join(directories['op_mode'], name)
-    name = os.path.splitext(name)[0].replace('-', '_')
-    return load_as_module(name, path)
+    mod_name = os.path.splitext(name)[0].replace('-', '_')
+    mod = load_as_module(mod_name, path)
+    if version is not None:
+        _op_mode_modules[name] = (version, mod)
+    return mod
 
 def is_show_function_name(name):
     if re.match(r"^show", name):
@@ -52,23 +73,23 @@ def _nth_rsplit(delim: str, n: int, s: str):
 
 # Since we have mangled possible hyphens in the file name while constructing
 # the snake case of the query/mutation name, we will need to recover the
-# file name by searching with mangling:
-def _filter_on_mangled(test):
-    def func(elem):
-        mangle = os.path.splitext(elem)[0].replace('-', '_')
-        return test == mangle
-    return func
+# file name from the mangled name:
+def op_mode_file_map(files: list) -> dict:
+    """ Map mangled basename to op-mode script file name """
+    res = {}
+    for elem in files:
+        res.setdefault(os.path.splitext(elem)[0].replace('-', '_'), elem)
+    return res
 
 # Find longest name in concatenated string that matches the basename of an
 # op-mode script. Should one prefer to concatenate in the reverse order
 # (script_name + '_' + function_name), use _nth_rsplit.
-def split_compound_op_mode_name(name: str, files: list):
+def split_compound_op_mode_name(name: str, files: Union[list, dict]):
+    file_map = files if isinstance(files, dict) else op_mode_file_map(files)
     for i in range(1, name.count('_') + 1):
         pair = _nth_split('_', i, name)
-        f = list(filter(_filter_on_mangled(pair[1]), files))
-        if f:
-            pair = (pair[0], f[0])
-            return pair
+        if pair[1] in file_map:
+            return (pair[0], file_map[pair[1]])
     return (name, '')
 
 def snake_to_pascal_case(name: str) -> str:
@@ -15,6 +15,8 @@
 
 import os
 import json
+from threading import Lock
+from time import monotonic
 
 from ariadne import convert_camel_case_to_snake
 
@@ -25,9 +27,99 @@
 
 from api.graphql.libs.op_mode import load_op_mode_as_module, split_compound_op_mode_name
 from api.graphql.libs.op_mode import normalize_output
+from api.graphql.libs.op_mode import op_mode_file_map
+from api.graphql.libs.op_mode import is_show_function_name
+from api.graphql.libs.op_mode import config_version
+from api.session import SessionState
 
 op_mode_include_file = os.path.join(directories['data'], 'op-mode-standardized.json')
 
+# Resolver registry: query/mutation name -> (function name, op-mode script),
+# filled when the resolvers are generated
+_op_mode_files = None
+_op_mode_resolvers = {}
+
+# Results of show queries: key -> (expiry, config version, result)
+_op_query_results = {}
+op_query_results_max = 256
+
+# Mutations in progress and number of mutations started so far; results of
+# show queries overlapping a mutation are not cached
+_op_mutations_lock = Lock()
+_op_mutations_running = 0
+_op_mutations_started = 0
+
+
+def _begin_op_mutation():
+    global _op_mutations_running, _op_mutations_started
+    with _op_mutations_lock:
+        _op_mutations_running += 1
+        _op_mutations_started += 1
+        _op_query_results.clear()
+
+
+def _end_op_mutation():
+    global _op_mutations_running
+    with _op_mutations_lock:
+        _op_mutations_running -= 1
+        _op_query_results.clear()
+
+
+def get_op_mode_files():
+    global _op_mode_files
+    if _op_mode_files is None:
+        try:
+            with open(op_mode_include_file) as f:
+                _op_mode_files = op_mode_file_map(json.loads(f.read()))
+        except Exception:
+            return None
+    return _op_mode_files
+
+
+def resolve_op_mode_name(name: str) -> tuple:
+    """Return (function name, op-mode script) for a query/mutation name"""
+    if name in _op_mode_resolvers:
+        return _op_mode_resolvers[name]
+
+    op_mode_files = get_op_mode_files()
+    # handle the case that the op-mode file name contains underscores:
+    if op_mode_files is None:
+        raise FileNotFoundError(f"No op-mode file list at '{op_mode_include_file}'")
+    (func_name, scriptname) = split_compound_op_mode_name(name, op_mode_files)
+    if scriptname == '':
+        raise FileNotFoundError(f"No op-mode file named in string '{name}'")
+
+    _op_mode_resolvers[name] = (func_name, scriptname)
+    return func_name, scriptname
+
+
+def _cached_op_query(key, ttl, func):
+    now = monotonic()
+    version = config_version()
+    if key in _op_query_results:
+        expiry, res_version, res = _op_query_results[key]
+        if now < expiry and res_version == version:
+            return res
+
+    started = _op_mutations_started
+    res = func()
+
+    with _op_mutations_lock:
+        if _op_mutations_running or started != _op_mutations_started:
+            return res
+        _store_op_query(key, now + ttl, version, res)
+    return res
+
+
+def _store_op_query(key, expiry, version, res):
+    now = monotonic()
+    if len(_op_query_results) >= op_query_results_max:
+        for k in [k for k, v in _op_query_results.items() if v[0] <= now]:
+            del _op_query_results[k]
+        if len(_op_query_results) >= op_query_results_max:
+            _op_query_results.clear()
+    _op_query_results[key] = (expiry, version, res)
+
 
 def get_config_dict(
     path=[],
@@ -72,12 +164,6 @@ def __init__(self, session, data):
         self._data = data
         self._name = convert_camel_case_to_snake(type(self).__name__)
 
-        try:
-            with open(op_mode_include_file) as f:
-                self._op_mode_list = json.loads(f.read())
-        except Exception:
-            self._op_mode_list = None
-
     def show_config(self):
         session = self._session
         data = self._data
@@ -176,43 +262,43 @@ def system_status(self):
     def gen_op_query(self):
         data = self._data
         name = self._name
-        op_mode_list = self._op_mode_list
 
-        # handle the case that the op-mode file contains underscores:
-        if op_mode_list is None:
-            raise FileNotFoundError(f"No op-mode file list at '{op_mode_include_file}'")
-        (func_name, scriptname) = split_compound_op_mode_name(name, op_mode_list)
-        if scriptname == '':
-            raise FileNotFoundError(f"No op-mode file named in string '{name}'")
+        (func_name, scriptname) = resolve_op_mode_name(name)
 
         mod = load_op_mode_as_module(f'{scriptname}')
         func = getattr(mod, func_name)
-        try:
-            res = func(True, **data)
-        except OpModeError as e:
-            raise e
 
-        res = normalize_output(res)
+        def run():
+            try:
+                res = func(True, **data)
+            except OpModeError as e:
+                raise e
+            return normalize_output(res)
 
-        return res
+        # Optionally serve repeated identical show queries from a short lived
+        # cache; the cache is dropped on commit
+        ttl = SessionState().cache_ttl
+        if ttl and is_show_function_name(func_name):
+            key = (name, json.dumps(data, sort_keys=True, default=str))
+            return _cached_op_query(key, ttl, run)
+
+        return run()
 
     def gen_op_mutation(self):
         data = self._data
         name = self._name
-        op_mode_list = self._op_mode_list
 
-        # handle the case that the op-mode file name contains underscores:
-        if op_mode_list is None:
-            raise FileNotFoundError(f"No op-mode file list at '{op_mode_include_file}'")
-        (func_name, scriptname) = split_compound_op_mode_name(name, op_mode_list)
-        if scriptname == '':
-            raise FileNotFoundError(f"No op-mode file named in string '{name}'")
+        (func_name, scriptname) = resolve_op_mode_name(name)
 
         mod = load_op_mode_as_module(f'{scriptname}')
         func = getattr(mod, func_name)
+        # a mutation may change what show queries return
+        _begin_op_mutation()
         try:
             res = func(**data)
         except OpModeError as e:
             raise e
+        finally:
+            _end_op_mutation()
 
         return res
@@ -23,6 +23,7 @@
 import logging
 import traceback
 from threading import Lock
+from time import monotonic
 from typing import Union
 from typing import Callable
 from typing import TYPE_CHECKING
@@ -44,8 +45,14 @@
 from vyos.configtree import ConfigTree
 from vyos.configdiff import get_config_diff
 from vyos.configsession import ConfigSessionError
+from vyos.xml_ref import is_leaf
+from vyos.xml_ref import is_multi
+from vyos.xml_ref import is_tag
+from vyos.xml_ref import is_valueless
 
 from ..session import SessionState
+from ..snapshot import ConfigSnapshotError
+from ..snapshot import RunningConfigSnapshot
 from .models import success
 from .models import error
 from .models import responses
@@ -227,7 +234,7 @@ async def body(self) -> bytes:
                                 400,
                                 f"Malformed command '{0}': 'path' field must be a list of strings",
                             )
-                    if endpoint in ('/configure'):
+                    if endpoint in ('/configure', '/configure-bulk'):
                         if not c['path']:
                             self.form_err = (
                                 400,
@@ -421,6 +428,164 @@ def _configure_op(
     return success(msg)
 
 
+def _split_config_path(path: list) -> tuple[list, list]:
+    """Split a CLI path into the node path and trailing leaf value"""
+    for i in range(1, len(path) + 1):
+        try:
+            if is_leaf(path[:i]):
+                return path[:i], path[i:]
+        except ValueError:
+            raise ConfigSessionError(f"Invalid path [{' '.join(path)}]")
+    return path, []
+
+
+def _tree_set(tree: ConfigTree, path: list):
+    """Equivalent of a CLI set on an in-memory config tree"""
+    node, value = _split_config_path(path)
+    if len(value) > 1:
+        raise ConfigSessionError(f"Invalid path [{' '.join(path)}]")
+
+    if value and is_leaf(node) and is_valueless(node):
+        raise ConfigSessionError(
+            f"Configuration path [{' '.join(node)}] does not take a value"
+        )
+
+    if value:
+        if is_multi(node):
+            if not tree.exists(node) or value[0] not in tree.return_values(node):
+                tree.set(node, value=value[0], replace=False)
+        else:
+            tree.set(node, value=value[0])
+    elif is_leaf(node) and not is_valueless(node):
+        raise ConfigSessionError(f"Configuration path [{' '.join(path)}] requires a value")
+    elif is_tag(node):
+        # a tag node can only be created together with a tag value
+        raise ConfigSessionError(f"Configuration path [{' '.join(path)}] requires a tag value")
+    elif not tree.exists(node):
+        tree.set(node)
+
+    # mark tag nodes, as the loaded config is rendered from the tree
+    for i in range(1, len(node)):
+        if is_tag(node[:i]) and not tree.is_tag(node[:i]):
+            tree.set_tag(node[:i])
+
+
+def _tree_delete(tree: ConfigTree, path: list):
+    """Equivalent of a CLI delete on an in-memory config tree"""
+    node, value = _split_config_path(path)
+    if len(value) > 1 or not tree.exists(node):
+        raise ConfigSessionError(
+            f"Cannot delete [{' '.join(path)}]: path/value does not exist"
+        )
+
+    if value:
+        values = tree.return_values(node)
+        if value[0] not in values:
+            raise ConfigSessionError(
+                f"Cannot delete [{' '.join(path)}]: path/value does not exist"
+            )
+        if len(values) > 1:
+            tree.delete_value(node, value[0])
+            return
+
+    tree.delete(node)
+    # a tag node without tag values is removed with its last value
+    parent = node[:-1]
+    if parent and tree.is_tag(parent) and not tree.list_nodes(parent):
+        tree.delete(parent)
+
+
+def _subtree_string(tree: ConfigTree, path: list):
+    if not tree.exists(path):
+        return None
+    return tree.get_subtree(path).to_string()
+
+
+def _configure_bulk_op(
+    data: Union[ConfigureModel, ConfigureListModel],
+    _request: Request,
+    background_tasks: BackgroundTasks,
+):
+    """Apply all commands to an in-memory copy of the session working config
+    and load the result in one step, rather than one set/delete per path"""
+    # pylint: disable=consider-using-with
+
+    state = SessionState()
+    session = state.session
+
+    if not isinstance(data, ConfigureListModel):
+        data = [data]
+    else:
+        data = data.commands
+
+    timing = {}
+    status = 200
+    msg = None
+    error_msg = None
+
+    lock.acquire()
+
+    start = monotonic()
+    try:
+        tree = ConfigTree(session.get_working_config())
+        https_config = _subtree_string(tree, ['service', 'https'])
+        timing['read'] = monotonic() - start
+
+        phase = monotonic()
+        for c in data:
+            path = c.path + [c.value] if c.value else c.path
+            if c.op == 'set':
+                _tree_set(tree, path)
+            elif c.op == 'delete':
+                _tree_delete(tree, path)
+            else:
+                raise ConfigSessionError(
+                    f"'{c.op}' is not a valid operation in bulk mode"
+                )
+        timing['compose'] = monotonic() - phase
+
+        phase = monotonic()
+        out = session.load_config_tree(tree)
+        # loadFile reports rejected paths in its output but still succeeds
+        failed = [l for l in out.splitlines() if 'failed' in l.lower()]
+        if failed:
+            raise ConfigSessionError('\n'.join(failed))
+        timing['load'] = monotonic() - phase
+
+        phase = monotonic()
+        if _subtree_string(tree, ['service', 'https']) != https_config:
+            background_tasks.add_task(call_commit, state)
+            msg = self_ref_msg
+        else:
+            # capture non-fatal warnings
+            out = session.commit()
+            msg = out if out else msg
+        timing['commit'] = monotonic() - phase
+
+        LOG.info(f"Configuration modified via HTTP API using key '{state.id}'")
+    except ConfigSessionError as e:
+        session.discard()
+        status = 400
+        if state.debug:
+            LOG.critical(f'ConfigSessionError:\n {traceback.format_exc()}')
+        error_msg = str(e)
+    except Exception:
+        session.discard()
+        LOG.critical(traceback.format_exc())
+        status = 500
+
+        # Don't give the details away to the outer world
+        error_msg = 'An internal error occured. Check the logs for details.'
+    finally:
+        lock.release()
+
+    if status != 200:
+        return error(status, error_msg)
+
+    timing['total'] = monotonic() - start
+    return success({'message': msg, 'timing': timing})
+
+
 def create_path_import_pki_no_prompt(path):
     correct_paths = ['ca', 'certificate', 'key-pair']
     if path[1] not in correct_paths:
@@ -448,48 +613,57 @@ def configure_section_op(
     return _configure_op(data, request, background_tasks)
 
 
-@router.post('/retrieve')
-async def retrieve_op(data: RetrieveModel):
-    state = SessionState()
-    session = state.session
-    env = session.get_session_env()
-    config = Config(session_env=env)
+@router.post('/configure-bulk')
+def configure_bulk_op(
+    data: Union[ConfigureModel, ConfigureListModel],
+    request: Request,
+    background_tasks: BackgroundTasks,
+):
+    return _configure_bulk_op(data, request, background_tasks)
 
+
+@router.post('/retrieve')
+def retrieve_op(data: RetrieveModel, request: Request):
+    # Served from an in-memory copy of the running config, re-read only after
+    # a commit; declared synchronous so FastAPI runs it in its threadpool
+    # instead of blocking the event loop
     op = data.op
-    path = ' '.join(data.path)
+    path = data.path
 
     try:
+        view = RunningConfigSnapshot().get()
+
+        config_format = data.configFormat if data.configFormat else 'json'
+        etag = view.etag(op, path, config_format)
+        if request.headers.get('if-none-match') == etag:
+            return Response(status_code=304, headers={'ETag': etag})
+
         if op == 'returnValue':
-            res = config.return_value(path)
+            res = view.return_value(path)
         elif op == 'returnValues':
-            res = config.return_values(path)
+            res = view.return_values(path)
         elif op == 'exists':
-            res = config.exists(path)
+            res = view.exists(path)
         elif op == 'showConfig':
-            config_format = 'json'
-            if data.configFormat:
-                config_format = data.configFormat
-
-            res = session.show_config(path=data.path)
             if config_format == 'json':
-                config_tree = ConfigTree(res)
-                res = json.loads(config_tree.to_json())
+                res = json.loads(view.subtree(path).to_json())
             elif config_format == 'json_ast':
-                config_tree = ConfigTree(res)
-                res = json.loads(config_tree.to_json_ast())
+                res = json.loads(view.subtree(path).to_json_ast())
             elif config_format == 'raw':
-                pass
+                res = view.show_config(path)
             else:
                 return error(400, f"'{config_format}' is not a valid config format")
         else:
             return error(400, f"'{op}' is not a valid operation")
-    except ConfigSessionError as e:
+    except (ConfigSessionError, ConfigSnapshotError) as e:
         return error(400, str(e))
     except Exception:
         LOG.critical(traceback.format_exc())
         return error(500, 'An internal error occured. Check the logs for details.')
 
-    return success(res)
+    response = success(res)
+    response.headers['ETag'] = etag
+    return response
 
 
 @router.post('/config-file')
@@ -39,3 +39,4 @@ def _initialize(self):
         self.auth_type = None
         self.token_exp = None
         self.secret_len = None
+        self.cache_ttl = 0
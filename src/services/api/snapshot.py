@@ -0,0 +1,136 @@
+# Copyright 2024 VyOS maintainers and contributors <maintainers@vyos.io>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import hashlib
+from threading import Lock
+
+from vyos.configtree import ConfigTree
+from vyos.configtree import ConfigTreeError
+from vyos.configquery import op_mode_run
+from vyos.utils.error import cli_shell_api_err
+from vyos.defaults import commit_stamp
+
+
+class ConfigSnapshotError(Exception):
+    pass
+
+
+class ConfigView:
+    """Read-only queries against one version of the running config"""
+
+    def __init__(self, version, text: str):
+        self.version = version
+        self.text = text
+        self.tag = hashlib.sha256(text.encode()).hexdigest()[:32]
+        self.tree = ConfigTree(text) if text.strip() else ConfigTree('\n')
+
+    def etag(self, *args) -> str:
+        """ETag of a request result: the config tag qualified by the
+        request parameters"""
+        qualifier = json.dumps(args)
+        digest = hashlib.sha256(f'{self.tag}:{qualifier}'.encode()).hexdigest()
+        return f'"{digest[:32]}"'
+
+    def exists(self, path: list) -> bool:
+        if self.tree.exists(path):
+            return True
+        # the path may end with a value
+        if len(path) < 2 or not self.tree.exists(path[:-1]):
+            return False
+        return path[-1] in self.return_values(path[:-1])
+
+    def return_value(self, path: list):
+        try:
+            return self.tree.return_value(path)
+        except ConfigTreeError:
+            return None
+
+    def return_values(self, path: list) -> list:
+        try:
+            return self.tree.return_values(path)
+        except ConfigTreeError:
+            return []
+
+    def subtree(self, path: list) -> ConfigTree:
+        if not path:
+            return self.tree
+        if not self.tree.exists(path):
+            raise ConfigSnapshotError('Configuration under specified path is empty')
+        return self.tree.get_subtree(path)
+
+    def show_config(self, path: list) -> str:
+        if not path:
+            return self.text
+        return self.subtree(path).to_string()
+
+
+class RunningConfigSnapshot:
+    """In-memory copy of the running config for read-only API requests.
+
+    The config is read and parsed once per commit; the version is the
+    modification time of the stamp file touched by the post-commit hook.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(RunningConfigSnapshot, cls).__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        self._lock = Lock()
+        self._view = None
+
+    @staticmethod
+    def _current_version():
+        try:
+            return os.stat(commit_stamp).st_mtime_ns
+        except OSError:
+            # no commit since boot, or stamp not writable: do not cache
+            return None
+
+    def get(self) -> ConfigView:
+        """Return a view of the running config, re-read only if a commit
+        happened since the last read"""
+        version = self._current_version()
+        view = self._view
+        if view is not None and version is not None and view.version == version:
+            return view
+
+        with self._lock:
+            # another request may have refreshed in the meantime
+            view = self._view
+            if view is not None and version is not None and view.version == version:
+                return view
+
+            rc, out = op_mode_run(
+                ['/bin/cli-shell-api', '--show-active-only',
+                 '--show-ignore-edit', 'showConfig']
+            )
+            if rc == cli_shell_api_err.VYOS_EMPTY_CONFIG:
+                out = ''
+            elif rc != 0:
+                raise ConfigSnapshotError(out)
+
+            view = ConfigView(version, out)
+            self._view = view
+
+        return view
@@ -19,20 +19,29 @@
 import re
 import select
 
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from os import getpid, environ
 from pathlib import Path
 from signal import signal, SIGTERM, SIGINT
 from sys import exit
+from threading import Lock
+from time import monotonic
 from systemd import journal
 
 from vyos.utils.dict import dict_search
+from vyos.utils.file import write_file
 from vyos.utils.process import run
 
 # Identify this script
 my_pid = getpid()
 my_name = Path(__file__).stem
 
+stats_file = '/run/vyos-event-handler.stats'
+
+# Characters that end the literal prefix of a pattern
+regex_special = set('.^$*+?{}[]\\|()')
+
 # handle termination signal
 def handle_signal(signal_type, frame):
     if signal_type == SIGTERM:
@@ -44,11 +53,44 @@ def handle_signal(signal_type, frame):
     exit(0)
 
 
+def literal_prefix(pattern: str) -> str:
+    """
+    Return the literal text every message fully matching pattern starts with
+
+    % literal_prefix('Link down on eth[0-9]+')
+    'Link down on eth'
+    """
+    # top-level alternation can not be told apart from a nested one without
+    # parsing the pattern, be conservative
+    if '|' in pattern:
+        return ''
+    prefix = ''
+    for char in pattern:
+        if char in regex_special:
+            # a quantifier makes the preceding character optional
+            if char in '*?{' and prefix:
+                prefix = prefix[:-1]
+            break
+        prefix += char
+    return prefix
+
+
 # Class for analyzing and process messages
 class Analyzer:
     # Initialize settings
-    def __init__(self, config: dict) -> None:
-        self.config = {}
+    def __init__(self, config: dict, limits: dict) -> None:
+        # Scripts are executed by a pool of workers, so a long running script
+        # does not block reading the journal. Matches beyond max-pending
+        # queued scripts are dropped, as are matches exceeding rate-limit
+        # executions per second (with bursts of up to rate-burst) of a rule.
+        self.max_pending = int(limits['max-pending'])
+        self.rate_limit = int(limits['rate-limit'])
+        self.rate_burst = int(limits['rate-burst'])
+        self.rules = []
+        # Rules indexed by syslog identifier, rules without identifier
+        # filter are checked for every message
+        self.rules_by_id = {}
+        self.rules_any = []
         # Prepare compiled regex objects
         for event_id, event_config in config.items():
             script = dict_search('script.path', event_config)
@@ -65,51 +107,98 @@ def __init__(self, config: dict) -> None:
                     environment[env_variable] = env_value.get('value')
             # Create final config dictionary
             pattern_raw = event_config['filter']['pattern']
-            pattern_compiled = re.compile(
-                rf'{event_config["filter"]["pattern"]}')
-            pattern_config = {
-                pattern_compiled: {
-                    'pattern_raw':
-                        pattern_raw,
-                    'syslog_id':
-                        dict_search('filter.syslog-identifier', event_config),
-                    'pattern_script': {
-                        'path': script,
-                        'environment': environment
-                    }
-                }
+            rule = {
+                'event_id': event_id,
+                'pattern_raw': pattern_raw,
+                'pattern_compiled': re.compile(rf'{pattern_raw}'),
+                'prefix': literal_prefix(pattern_raw),
+                'syslog_id': dict_search('filter.syslog-identifier', event_config),
+                'pattern_script': {
+                    'path': script,
+                    'environment': environment
+                },
+                'tokens': self.rate_burst,
+                'last_refill': monotonic(),
+                'counters': {'matched': 0, 'executed': 0, 'failed': 0,
+                             'rate_limited': 0, 'dropped': 0}
             }
-            self.config.update(pattern_config)
+            self.rules.append(rule)
+            if rule['syslog_id']:
+                self.rules_by_id.setdefault(rule['syslog_id'], []).append(rule)
+            else:
+                self.rules_any.append(rule)
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(limits['script-workers']))
+        self.pending = 0
+        self.lock = Lock()
 
     # Execute script safely
-    def script_run(self, pattern: str, script_path: str,
-                   script_env: dict) -> None:
+    def script_run(self, rule: dict, script_env: dict) -> None:
+        pattern = rule['pattern_raw']
+        script_path = rule['pattern_script']['path']
         try:
             run(script_path, env=script_env)
             journal.send(
                 f'Pattern found: "{pattern}", script executed: "{script_path}"',
                 SYSLOG_IDENTIFIER=my_name)
+            failed = False
         except Exception as err:
             journal.send(
                 f'Pattern found: "{pattern}", failed to execute script "{script_path}": {err}',
                 SYSLOG_IDENTIFIER=my_name)
+            failed = True
+        with self.lock:
+            self.pending -= 1
+            rule['counters']['failed' if failed else 'executed'] += 1
+
+    def rate_allowed(self, rule: dict) -> bool:
+        now = monotonic()
+        rule['tokens'] = min(self.rate_burst, rule['tokens'] +
+                             (now - rule['last_refill']) * self.rate_limit)
+        rule['last_refill'] = now
+        if rule['tokens'] < 1:
+            return False
+        rule['tokens'] -= 1
+        return True
+
+    # Queue script execution of a matching rule
+    def script_submit(self, rule: dict, message: str) -> None:
+        if not self.rate_allowed(rule):
+            rule['counters']['rate_limited'] += 1
+            return
+        with self.lock:
+            if self.pending >= self.max_pending:
+                rule['counters']['dropped'] += 1
+                return
+            self.pending += 1
+        # Add message to a per execution copy of the environment variables
+        script_env = rule['pattern_script']['environment'].copy()
+        script_env['message'] = message
+        self.executor.submit(self.script_run, rule, script_env)
 
     # Analyze a message
     def process_message(self, message: dict) -> None:
-        for pattern_compiled, pattern_config in self.config.items():
-            # Check if syslog id is presented in config and matches
-            syslog_id = pattern_config.get('syslog_id')
-            if syslog_id and message['SYSLOG_IDENTIFIER'] != syslog_id:
-                continue
-            if pattern_compiled.fullmatch(message['MESSAGE']):
-                # Add message to environment variables
-                pattern_config['pattern_script']['environment'][
-                    'message'] = message['MESSAGE']
-                # Run script
-                self.script_run(
-                    pattern=pattern_config['pattern_raw'],
-                    script_path=pattern_config['pattern_script']['path'],
-                    script_env=pattern_config['pattern_script']['environment'])
+        text = message['MESSAGE']
+        syslog_id = message.get('SYSLOG_IDENTIFIER')
+        for rules in (self.rules_by_id.get(syslog_id, ()), self.rules_any):
+            for rule in rules:
+                if not text.startswith(rule['prefix']):
+                    continue
+                if rule['pattern_compiled'].fullmatch(text):
+                    rule['counters']['matched'] += 1
+                    self.script_submit(rule, text)
+
+    def write_stats(self) -> None:
+        """
+        Export per rule counters for monitoring
+        """
+        with self.lock:
+            stats = {
+                'pending': self.pending,
+                'rules': {rule['event_id']: rule['counters'] for rule in self.rules}
+            }
+            write_file(stats_file, json.dumps(stats))
 
 
 if __name__ == '__main__':
@@ -126,8 +215,10 @@ def process_message(self, message: dict) -> None:
     try:
         config_path = Path(args.config)
         config = json.loads(config_path.read_text())
+        limits = config['limits']
+        stats_interval = int(limits['statistics-interval'])
         # Create an object for analazyng messages
-        analyzer = Analyzer(config)
+        analyzer = Analyzer(config['event'], limits)
     except Exception as err:
         print(
             f'Configuration file "{config_path}" does not exist or malformed: {err}'
@@ -148,8 +239,13 @@ def process_message(self, message: dict) -> None:
     journal.send(f'Started with configuration: {config}',
                  SYSLOG_IDENTIFIER=my_name)
 
-    while p.poll():
-        if data.process() != journal.APPEND:
+    last_stats = 0
+    while True:
+        ready = p.poll(stats_interval * 1000)
+        if monotonic() - last_stats >= stats_interval:
+            analyzer.write_stats()
+            last_stats = monotonic()
+        if not ready or data.process() != journal.APPEND:
             continue
         for entry in data:
             message = entry['MESSAGE']
@@ -0,0 +1,46 @@
+# Copyright (C) 2024 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from unittest import TestCase
+
+from vyos.accel_ppp import SessionIndex
+from vyos.accel_ppp import accel_out_parse
+
+sessions_output = """ ifname | username |     ip     |        ip6        | state
+--------+----------+------------+-------------------+--------
+ ppp0   | alice    | 100.64.0.1 | 2001:db8::1/128   | active
+ ppp1   | bob      | 100.64.0.2 |                   | active
+ ppp2   | alice    | 100.64.0.3 |                   | start
+"""
+
+class TestAccelPPP(TestCase):
+    def test_accel_out_parse(self):
+        sessions = accel_out_parse(sessions_output.splitlines())
+        self.assertEqual(len(sessions), 3)
+        self.assertEqual(sessions[0], {'ifname': 'ppp0', 'username': 'alice',
+                                       'ip': '100.64.0.1', 'ip6': '2001:db8::1/128',
+                                       'state': 'active'})
+        self.assertEqual(sessions[1]['ip6'], '')
+        self.assertEqual(accel_out_parse([]), [])
+
+    def test_session_index(self):
+        index = SessionIndex(accel_out_parse(sessions_output.splitlines()))
+        self.assertEqual(len(index), 3)
+        self.assertEqual([s['ifname'] for s in index.find(username='alice')],
+                         ['ppp0', 'ppp2'])
+        self.assertEqual([s['ifname'] for s in index.find(ip='2001:db8::1')],
+                         ['ppp0'])
+        self.assertEqual(index.find(username='alice', ifname='ppp1'), [])
+        self.assertEqual(index.find(ifname='ppp1')[0]['username'], 'bob')
+        self.assertEqual(len(index.find()), 3)
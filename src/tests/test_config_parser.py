@@ -51,3 +51,34 @@ def test_rename(self):
     def test_rename_duplicate(self):
         with self.assertRaises(vyos.configtree.ConfigTreeError):
             self.config.rename(["top-level-tag-node", "foo"], "bar")
+
+    def test_to_dict(self):
+        full = self.config.to_dict()
+        self.assertEqual(self.config.to_dict(["normal-node"]), full["normal-node"])
+        self.assertEqual(self.config.to_dict(["top-level-leaf-node"]), "foo")
+        with self.assertRaises(vyos.configtree.ConfigTreeError):
+            self.config.to_dict(["non-existent-node"])
+
+    def test_exists_many(self):
+        paths = [["top-level-leaf-node"], ["non-existent-node"],
+                 ["top-level-tag-node", "bar"]]
+        self.assertEqual(self.config.exists_many(paths),
+                         [self.config.exists(p) for p in paths])
+
+    def test_list_nodes_many(self):
+        self.assertEqual(self.config.list_nodes_many([["top-level-tag-node"], ["non-existent-node"]],
+                                                     path_must_exist=False),
+                         [["bar", "foo"], []])
+        with self.assertRaises(vyos.configtree.ConfigTreeError):
+            self.config.list_nodes_many([["non-existent-node"]])
+
+    def test_return_values_many(self):
+        paths = [["top-level-leaf-node"], ["normal-node", "normal-node-child", "multi-node"]]
+        self.assertEqual(self.config.return_values_many(paths),
+                         [self.config.return_values(p) for p in paths])
+
+    def test_deep_copy(self):
+        copy = vyos.configtree.deep_copy(self.config)
+        self.assertEqual(copy.to_string(no_version=True), self.config.to_string(no_version=True))
+        copy.delete(["top-level-leaf-node"])
+        self.assertTrue(self.config.exists(["top-level-leaf-node"]))
@@ -14,6 +14,9 @@
 
 import os
 from vyos.configdep import check_dependency_graph
+from vyos.configdep import dependency_participants
+from vyos.configdep import priority_tiers
+from vyos.configdep import read_dependency_dict
 
 _here = os.path.dirname(__file__)
 ddir = os.path.join(_here, '../../data/config-mode-dependencies')
@@ -27,3 +30,17 @@ def setUp(self):
     def test_acyclic(self):
         res = check_dependency_graph(dependency_dir=ddir)
         self.assertTrue(res)
+
+    def test_participants(self):
+        d = read_dependency_dict(dependency_dir=ddir)
+        res = dependency_participants(d)
+        self.assertIn('pki', res)
+        self.assertIn('interfaces_ethernet', res)
+        self.assertIn('load_balancing_haproxy', res)
+        self.assertNotIn('system_host_name', res)
+
+    def test_priority_tiers(self):
+        scripts = [(300, 'c'), (100, 'a'), (300, 'd'), (100, 'b'),
+                   (300, 'e'), (200, 'f')]
+        res = priority_tiers(scripts, serial={'d'})
+        self.assertEqual(res, [['a', 'b'], ['f'], ['c', 'e'], ['d']])
@@ -0,0 +1,161 @@
+# Copyright (C) 2024 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from vyos import frr
+from vyos.frr import FRRConfig
+from vyos.frr import diff_configuration
+
+def bgp_config(neighbors, description='uplink'):
+    config = ['!', 'router bgp 65000', ' bgp router-id 192.0.2.254']
+    for i in range(neighbors):
+        config.append(f' neighbor 10.0.{i // 256}.{i % 256} remote-as 65001')
+    config.append(f' neighbor 10.0.0.1 description {description}')
+    config += [' !', ' address-family ipv4 unicast', '  network 198.51.100.0/24',
+               ' exit-address-family', 'exit', '!', 'ip route 0.0.0.0/0 192.0.2.1', '!']
+    return config
+
+class TestFRRDiff(TestCase):
+    def test_unchanged(self):
+        commands, incremental, _, _ = diff_configuration(bgp_config(10), bgp_config(10))
+        self.assertEqual(commands, [])
+        self.assertTrue(incremental)
+
+    def test_single_neighbor(self):
+        old = bgp_config(2000)
+        new = bgp_config(2000, description='transit')
+        commands, incremental, added, removed = diff_configuration(old, new)
+        self.assertTrue(incremental)
+        self.assertEqual(commands, ['router bgp 65000',
+                                    ' no neighbor 10.0.0.1 description uplink',
+                                    ' neighbor 10.0.0.1 description transit',
+                                    'exit'])
+        self.assertEqual(added, [('router bgp 65000', 'neighbor 10.0.0.1 description transit')])
+        self.assertEqual(removed, [('router bgp 65000', 'neighbor 10.0.0.1 description uplink')])
+
+    def test_nested_context(self):
+        old = bgp_config(1)
+        new = [l.replace('198.51.100.0/24', '203.0.113.0/24') for l in old]
+        commands, incremental, _, _ = diff_configuration(old, new)
+        self.assertTrue(incremental)
+        self.assertEqual(commands, ['router bgp 65000',
+                                    ' address-family ipv4 unicast',
+                                    '  no network 198.51.100.0/24',
+                                    '  network 203.0.113.0/24',
+                                    ' exit',
+                                    'exit'])
+
+    def test_new_section(self):
+        old = ['!', 'ip route 0.0.0.0/0 192.0.2.1', '!']
+        new = old + ['router ospf', ' ospf router-id 192.0.2.254', 'exit', '!']
+        commands, incremental, _, _ = diff_configuration(old, new)
+        self.assertTrue(incremental)
+        self.assertEqual(commands, ['router ospf', ' ospf router-id 192.0.2.254', 'exit'])
+
+    def test_removed_section(self):
+        # removing a context with sub-configuration requires a full reload
+        old = bgp_config(1)
+        new = ['!', 'ip route 0.0.0.0/0 192.0.2.1', '!']
+        _, incremental, _, _ = diff_configuration(old, new)
+        self.assertFalse(incremental)
+
+    def test_cascading_removal(self):
+        old = bgp_config(2)
+        new = [l for l in old if 'neighbor 10.0.0.1 remote-as' not in l]
+        _, incremental, _, _ = diff_configuration(old, new)
+        self.assertFalse(incremental)
+
+    def test_negated_line(self):
+        old = ['router bgp 65000', ' no bgp ebgp-requires-policy', 'exit']
+        new = ['router bgp 65000', 'exit']
+        commands, _, _, _ = diff_configuration(old, new)
+        self.assertEqual(commands, ['router bgp 65000', ' bgp ebgp-requires-policy', 'exit'])
+
+
+class TestFRRIncrementalCommit(TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.running = ['!', 'router bgp 65000', ' bgp router-id 192.0.2.254', 'exit',
+                        '!', 'line vty', '!']
+        self.vtysh = []
+        self.vtysh_code = 0
+
+        def get_configuration(daemon=None, marked=False):
+            return '\n'.join(self.running)
+
+        def reload_configuration(config, daemon=None):
+            self.running = config.split('\n')
+
+        def popen(command, **kwargs):
+            with open(command.split()[-1]) as f:
+                self.vtysh.append((command, f.read().split('\n')[:-1]))
+            return '', self.vtysh_code
+
+        for name, mock in [('path_applied_state', os.path.join(self.tmp.name, 'applied.json')),
+                           ('get_configuration', get_configuration),
+                           ('reload_configuration', reload_configuration),
+                           ('popen', popen),
+                           ('save_configuration', lambda: None)]:
+            patcher = patch.object(frr, name, mock)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def commit(self, description):
+        config = FRRConfig()
+        config.load_configuration('bgpd')
+        config.modify_section(r'^router bgp \d+', stop_pattern='^exit', remove_stop_mark=True)
+        config.add_before(r'(line vty)', ['router bgp 65000', ' bgp router-id 192.0.2.254',
+                                          f' neighbor 10.0.0.1 description {description}',
+                                          'exit'])
+        with patch.object(frr, 'reload_configuration',
+                          side_effect=frr.reload_configuration) as reload:
+            config.commit_configuration('bgpd')
+        return reload.called
+
+    def test_incremental_commit(self):
+        # no state of a previous commit, a full reload is required
+        self.assertTrue(self.commit('uplink'))
+        self.assertEqual(self.vtysh, [])
+
+        self.assertFalse(self.commit('transit'))
+        command, lines = self.vtysh[-1]
+        self.assertIn('-d bgpd', command)
+        self.assertEqual(lines, ['router bgp 65000',
+                                 ' no neighbor 10.0.0.1 description uplink',
+                                 ' neighbor 10.0.0.1 description transit',
+                                 'exit'])
+
+    def test_vtysh_failure(self):
+        self.assertTrue(self.commit('uplink'))
+        # vtysh may have applied a part of the commands, fall back to a reload
+        self.vtysh_code = 1
+        self.assertTrue(self.commit('transit'))
+        self.assertIn(' neighbor 10.0.0.1 description transit', self.running)
+
+        self.vtysh_code = 0
+        self.assertFalse(self.commit('uplink'))
+
+    def test_running_config_changed(self):
+        self.assertTrue(self.commit('uplink'))
+        # configuration changed behind our back, e.g. by vtysh
+        index = self.running.index('router bgp 65000') + 1
+        self.running.insert(index, ' neighbor 10.0.0.2 remote-as 65002')
+        self.assertTrue(self.commit('transit'))
+        self.assertEqual(self.vtysh, [])
@@ -0,0 +1,56 @@
+# Copyright (C) 2024 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import vyos.utils.process
+from unittest import TestCase
+
+class TestVyOSUtilsProcess(TestCase):
+    def setUp(self):
+        vyos.utils.process.invalidate_command_cache()
+        vyos.utils.process.reset_command_stats()
+
+    def test_command_cache(self):
+        cmd = vyos.utils.process.cmd
+        with vyos.utils.process.command_cache_scope():
+            first = cmd('date +%N', cache=True)
+            self.assertEqual(first, cmd('date +%N', cache=True))
+            # uncached commands which might change state invalidate the cache
+            cmd('true')
+            self.assertNotEqual(first, cmd('date +%N', cache=True))
+
+    def test_command_cache_inactive(self):
+        cmd = vyos.utils.process.cmd
+        first = cmd('date +%N', cache=True)
+        self.assertNotEqual(first, cmd('date +%N', cache=True))
+
+    def test_read_only_commands(self):
+        read_only = vyos.utils.process.read_only_commands
+        self.assertTrue(read_only.match('ip -d -j link show dev eth0'))
+        self.assertTrue(read_only.match('nft -j list set ip vyos_filter foo'))
+        self.assertTrue(read_only.match('ethtool --json --show-ring eth0'))
+        self.assertFalse(read_only.match('ip link set dev eth0 up'))
+        self.assertFalse(read_only.match('ethtool -K eth0 gro on'))
+        self.assertFalse(read_only.match('sysctl -w net.ipv4.ip_forward=1'))
+
+    def test_command_stats(self):
+        vyos.utils.process.cmd('true')
+        self.assertEqual(vyos.utils.process.get_command_stats(), [])
+        vyos.utils.process.enable_command_stats()
+        try:
+            vyos.utils.process.cmd('true')
+            vyos.utils.process.cmd('true')
+        finally:
+            vyos.utils.process.enable_command_stats(False)
+        command, count, _ = vyos.utils.process.get_command_stats()[0]
+        self.assertEqual((command, count), ('true', 2))